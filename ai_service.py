@@ -1,118 +1,445 @@
 """
 Centralized AI service for all model calls in Dwell
-Consolidates OpenAI API calls and provides a unified interface
+Consolidates model calls behind a pluggable backend and provides a unified interface
 """
 
-import instructor
-from openai import OpenAI
+import hashlib
 import os
-from typing import List, Dict, Any, Optional
+import contextvars
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, Iterator
 from dotenv import load_dotenv
+from pydantic import ValidationError
+from extraction_cache import ExtractionCache
+from llm import LLMProvider
+from llm.providers import LocalProvider, OpenAIProvider
+from retry_policy import RetryPolicy, rate_limiter
+from prompt_catalogs import EMOTION_CATALOG, PROMPT_CATALOG_STYLE, VALUE_CATALOG
+from token_counter import count_message_tokens, count_tokens
+from usage_metrics import UsageMetrics
 
 load_dotenv()
 
+# Upper bound on concurrent model calls made by the batch helpers
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+
+# Model tiers, and the tier each call site is routed to. Override a tier's model
+# with MODEL_TIER_<TIER> and a call site's route with MODEL_ROUTE_<CALL_SITE>,
+# which accepts either a tier name or a model name.
+MODEL_TIERS = {
+    "small": os.getenv("MODEL_TIER_SMALL", "gpt-3.5-turbo"),
+    "large": os.getenv("MODEL_TIER_LARGE", "gpt-4"),
+}
+DEFAULT_TIER = "large"
+# Structured extractions that fail validation are retried on this tier
+FALLBACK_TIER = "large"
+MODEL_ROUTES = {
+    call_site: os.getenv(f"MODEL_ROUTE_{call_site.upper()}", tier)
+    for call_site, tier in {
+        "extract_activities_emotions": "small",
+        "extract_value_comparisons": "small",
+        "extract_entry_analysis": "small",
+        "summarize_conversation": "small",
+        "chat_thread": "large",
+        "chat_thread_stream": "large",
+        "simple_completion": "large",
+    }.items()
+}
+
+
+# Bump these whenever an extraction prompt or response model changes so that
+# cached results produced by the old prompt are no longer served. The catalog
+# style is part of the version since it changes the prompt too.
+ACTIVITIES_EMOTIONS_PROMPT_VERSION = f"2:{PROMPT_CATALOG_STYLE}"
+VALUE_COMPARISONS_PROMPT_VERSION = f"2:{PROMPT_CATALOG_STYLE}"
+ENTRY_ANALYSIS_PROMPT_VERSION = f"2:{PROMPT_CATALOG_STYLE}"
+
+
+CONVERSATION_SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and a supportive assistant. Update the current summary with the new messages. Keep what matters for continuing the conversation: the user's situation, feelings, values, and any advice, decisions or commitments. Reply with the summary only, in at most {max_words} words."""
+
+
+class ConversationContext:
+    """Fits a chat thread into a token budget before it is sent to the model.
+
+    Threads that fit are sent unchanged. Otherwise leading system messages are
+    kept, as many of the last ``keep_turns`` user/assistant turns as fit are
+    kept verbatim, and everything older is folded into a running summary sent
+    as one extra system message. Summaries are cached by a hash of the folded
+    prefix; when the prefix grows, the longest cached summary is extended with
+    only the new messages, so a turn costs at most one small summary call.
+    """
+
+    def __init__(
+        self,
+        summarize: Callable[[str, List[Dict[str, str]]], str],
+        max_tokens: int = None,
+        keep_turns: int = None,
+        summary_tokens: int = None,
+        max_summaries: int = 256,
+    ):
+        self.summarize = summarize
+        self.max_tokens = max_tokens or int(
+            os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "6000")
+        )
+        self.keep_turns = (
+            keep_turns
+            if keep_turns is not None
+            else int(os.getenv("CHAT_CONTEXT_KEEP_TURNS", "6"))
+        )
+        self.summary_tokens = summary_tokens or max(self.max_tokens // 10, 100)
+        self.max_summaries = max_summaries
+        self._summaries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _prefix_hashes(messages: List[Dict[str, str]]) -> List[str]:
+        """Hash of every prefix of ``messages``, computed as a chain in one pass."""
+        hashes = []
+        digest = ""
+        for message in messages:
+            digest = hashlib.sha256(
+                f"{digest}\x00{message['role']}\x00{message.get('content') or ''}".encode()
+            ).hexdigest()
+            hashes.append(digest)
+        return hashes
+
+    def _summary_for(self, folded: List[Dict[str, str]]) -> str:
+        hashes = self._prefix_hashes(folded)
+        with self._lock:
+            start = len(folded)
+            while start and hashes[start - 1] not in self._summaries:
+                start -= 1
+            previous = self._summaries[hashes[start - 1]] if start else ""
+            if start:
+                self._summaries.move_to_end(hashes[start - 1])
+        if start == len(folded):
+            return previous
+
+        summary = self.summarize(previous, folded[start:])
+        with self._lock:
+            self._summaries[hashes[-1]] = summary
+            while len(self._summaries) > self.max_summaries:
+                self._summaries.popitem(last=False)
+        return summary
+
+    def fit(
+        self, messages: List[Dict[str, str]], model: str = "gpt-4"
+    ) -> List[Dict[str, str]]:
+        """Return ``messages`` trimmed to the token budget."""
+        if count_message_tokens(messages, model) <= self.max_tokens:
+            return messages
+
+        split = 0
+        while split < len(messages) and messages[split]["role"] == "system":
+            split += 1
+        system, history = messages[:split], messages[split:]
+
+        # Keep the newest messages that fit next to the system prompt and a
+        # summary; the last message (the one to answer) is always kept
+        available = (
+            self.max_tokens - count_message_tokens(system, model) - self.summary_tokens
+        )
+        kept = 0
+        while kept < min(len(history), max(1, 2 * self.keep_turns)):
+            tail = history[len(history) - kept - 1 :]
+            if kept and count_message_tokens(tail, model) > available:
+                break
+            kept += 1
+        folded = history[: len(history) - kept]
+        if not folded:
+            return messages
+
+        try:
+            summary = self._summary_for(folded)
+        except Exception as e:
+            print(f"Could not summarize earlier conversation, dropping it: {e}")
+            return system + history[len(folded) :]
+        return (
+            system
+            + [
+                {
+                    "role": "system",
+                    "content": f"Summary of the earlier conversation: {summary}",
+                }
+            ]
+            + history[len(folded) :]
+        )
+
 
 class AIService:
     """Centralized AI service for all model calls."""
 
-    def __init__(self):
-        """Initialize AI service with different client configurations."""
-        # Standard OpenAI client
-        self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-        # OpenAI client with Helicone tracking
-        self.helicone_client = OpenAI(
-            api_key=os.getenv("OPENAI_API_KEY"),
-            base_url="https://oai.hconeai.com/v1",
-            default_headers={
-                "Helicone-Auth": os.getenv("HELICONE_AUTH"),
-            },
-        )
-
-        # Instructor-patched client for structured outputs
-        self.instructor_client = instructor.patch(
-            OpenAI(
-                api_key=os.getenv("OPENAI_API_KEY"),
-                # Commented out Helicone for instructor calls to avoid conflicts
-                # base_url="https://oai.hconeai.com/v1",
-                # default_headers={
-                #     "Helicone-Auth": os.getenv("HELICONE_AUTH"),
-                # }
-            )
+    def __init__(self, backend_name: str = None):
+        """Initialize AI service with the backend named by AI_BACKEND (default openai)."""
+        if backend_name is None:
+            backend_name = os.getenv("AI_BACKEND", "openai")
+
+        self.backend = self._create_backend(backend_name)
+
+        # Persistent cache of structured extractions keyed by content hash
+        self.extraction_cache = ExtractionCache()
+
+        # Token usage and latency per call site and per user
+        self.metrics = UsageMetrics()
+
+        # Keeps chat threads under the token budget with a running summary
+        self.conversation_context = ConversationContext(self.summarize_conversation)
+
+    def _create_backend(self, backend_name: str) -> LLMProvider:
+        """Create and return the specified model backend."""
+        if backend_name == "openai":
+            return OpenAIProvider()
+        elif backend_name == "local":
+            return LocalProvider()
+        else:
+            raise ValueError(f"Unknown AI backend: {backend_name}")
+
+    def _record_usage(
+        self,
+        call_site: str,
+        started: float,
+        estimated_prompt_tokens: int,
+        usage: Any = None,
+        completion_text: str = "",
+        model: str = "gpt-4",
+        error: bool = False,
+    ):
+        """Record a model call, using the API's ``usage`` when it was returned."""
+        if usage is not None:
+            prompt_tokens = usage.prompt_tokens
+            completion_tokens = usage.completion_tokens
+        else:
+            prompt_tokens = 0 if error else estimated_prompt_tokens
+            completion_tokens = count_tokens(completion_text, model)
+        self.metrics.record(
+            call_site,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            estimated_prompt_tokens=estimated_prompt_tokens,
+            latency_seconds=time.perf_counter() - started,
+            error=error,
         )
 
-    def _validate_api_key(self):
-        """Validate that OpenAI API key is properly set."""
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key or not api_key.startswith("sk-"):
-            raise ValueError("Please enter a valid OpenAI API key!")
+    def route_model(self, call_site: str) -> str:
+        """Model configured for a call site (see MODEL_ROUTES and MODEL_TIERS)."""
+        route = MODEL_ROUTES.get(call_site, DEFAULT_TIER)
+        return MODEL_TIERS.get(route, route)
+
+    def get_metrics(self) -> Dict[str, Dict]:
+        """Token usage and latency totals: overall, per call site and per user."""
+        return self.metrics.snapshot()
+
+    def reset_metrics(self):
+        """Zero the usage metrics."""
+        self.metrics.reset()
 
     def chat_completion(
         self,
         messages: List[Dict[str, str]],
-        model: str = "gpt-4",
+        model: Optional[str] = None,
         temperature: float = 0.7,
         use_helicone: bool = True,
+        call_site: str = "chat_completion",
     ) -> str:
         """
         Standard chat completion for thread-based conversations.
         Used by: chat pages (What to Do, How to Feel, Perspectives)
         """
-        self._validate_api_key()
-
-        client = self.helicone_client if use_helicone else self.openai_client
-
-        completion = client.chat.completions.create(
-            temperature=temperature,
+        model = model or self.route_model(call_site)
+
+        estimated_prompt_tokens = count_message_tokens(messages, model)
+        rate_limiter.acquire()
+        started = time.perf_counter()
+        try:
+            content, usage = self.backend.chat(
+                messages, model, temperature, use_helicone
+            )
+        except Exception:
+            self._record_usage(
+                call_site, started, estimated_prompt_tokens, model=model, error=True
+            )
+            raise
+        self._record_usage(
+            call_site,
+            started,
+            estimated_prompt_tokens,
+            usage=usage,
+            completion_text=content or "",
             model=model,
-            messages=messages,
         )
-        return completion.choices[0].message.content
+        return content
+
+    def chat_completion_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        use_helicone: bool = True,
+        call_site: str = "chat_completion_stream",
+    ) -> Iterator[str]:
+        """
+        Streaming chat completion yielding content deltas as they arrive.
+        Streams report no usage, so tokens are counted locally once it ends.
+        Used by: chat_thread_stream
+        """
+        model = model or self.route_model(call_site)
+
+        estimated_prompt_tokens = count_message_tokens(messages, model)
+        rate_limiter.acquire()
+        started = time.perf_counter()
+        deltas = []
+        error = False
+        try:
+            for delta in self.backend.chat_stream(
+                messages, model, temperature, use_helicone
+            ):
+                deltas.append(delta)
+                yield delta
+        except Exception:
+            error = True
+            raise
+        finally:
+            self._record_usage(
+                call_site,
+                started,
+                estimated_prompt_tokens,
+                completion_text="".join(deltas),
+                model=model,
+                error=error,
+            )
 
     def simple_completion(
         self,
         system_prompt: str,
         user_input: str,
-        model: str = "gpt-4",
+        model: Optional[str] = None,
         temperature: float = 0.7,
     ) -> str:
         """
         Simple system + user prompt completion.
         Used by: basic AI responses
         """
+        model = model or self.route_model("simple_completion")
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_input},
         ]
-        return self.chat_completion(messages, model, temperature, use_helicone=False)
+        return self.chat_completion(
+            messages, model, temperature, use_helicone=False, call_site="simple_completion"
+        )
 
     def structured_completion(
-        self, messages: List[Dict[str, str]], response_model: Any, model: str = "gpt-4"
+        self,
+        messages: List[Dict[str, str]],
+        response_model: Any,
+        model: Optional[str] = None,
+        call_site: str = "structured_completion",
     ) -> Any:
         """
         Structured completion using instructor for typed responses.
         Used by: get_activities_emotions, get_value_comparisons
         """
-        self._validate_api_key()
-
-        result = self.instructor_client.chat.completions.create(
+        model = model or self.route_model(call_site)
+
+        estimated_prompt_tokens = count_message_tokens(messages, model)
+        rate_limiter.acquire()
+        started = time.perf_counter()
+        try:
+            result, usage = self.backend.structured(messages, response_model, model)
+        except Exception:
+            self._record_usage(
+                call_site, started, estimated_prompt_tokens, model=model, error=True
+            )
+            raise
+        self._record_usage(
+            call_site,
+            started,
+            estimated_prompt_tokens,
+            usage=usage,
+            completion_text=result.model_dump_json(),
             model=model,
-            response_model=response_model,
-            messages=messages,
         )
         return result
 
+    def cached_structured_completion(
+        self,
+        kind: str,
+        content: str,
+        prompt_version: str,
+        messages: List[Dict[str, str]],
+        response_model: Any,
+        model: Optional[str] = None,
+        user_bio: str = "",
+        call_site: str = "cached_structured_completion",
+    ) -> Any:
+        """
+        Structured completion served from the extraction cache when the same
+        content was already extracted with the same prompt, model and bio.
+        Falls back to the FALLBACK_TIER model when the response fails validation.
+        Used by: extract_activities_emotions, extract_value_comparisons
+        """
+        model = model or self.route_model(call_site)
+        # Results from other backends (e.g. the local stand-in) never mix with OpenAI's
+        cache_model = (
+            model
+            if self.backend.provider_name == "openai"
+            else f"{self.backend.provider_name}:{model}"
+        )
+        key = self.extraction_cache.make_key(
+            kind, content, prompt_version, cache_model, user_bio
+        )
+        try:
+            cached = self.extraction_cache.get(key)
+            if cached is not None:
+                result = response_model.model_validate_json(cached)
+                self.metrics.record(call_site, cache_hit=True)
+                return result
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Extraction cache lookup failed, calling the model: {e}")
+
+        try:
+            result = self.structured_completion(
+                messages, response_model, model, call_site
+            )
+        except ValidationError as e:
+            fallback_model = MODEL_TIERS[FALLBACK_TIER]
+            if model == fallback_model:
+                raise
+            print(
+                f"{call_site}: {model} response failed validation, retrying with {fallback_model}: {e}"
+            )
+            result = self.structured_completion(
+                messages, response_model, fallback_model, call_site
+            )
+
+        try:
+            self.extraction_cache.set(key, result.model_dump_json())
+        except sqlite3.Error as e:
+            print(f"Could not store extraction in cache: {e}")
+        return result
+
     def extract_activities_emotions(
-        self, content: str, user_bio: str, type: str = "journal entry"
+        self,
+        content: str,
+        user_bio: str,
+        type: str = "journal entry",
+        model: Optional[str] = None,
     ) -> Any:
         """
         Extract activities and emotions from content.
         Used by: utils.py get_activities_emotions
         """
-        from emotions import emotion_descriptions
+        model = model or self.route_model("extract_activities_emotions")
+        # Catalog first and user bio last so the prompt prefix is identical across calls
+        system_prompt = f"""{EMOTION_CATALOG}
+
+Extract the following {type} into a list of salient ActivityEmotions, and how the user feels about that detailed activity and their outcome (please be explicit and complete), if unknown say unknown. Please only use the emotions listed above.
 
-        system_prompt = f"""Extract the following {type} into a list of salient ActivityEmotions, and how the user feels about that detailed activity and their outcome (please be explicit and complete), if unknown say unknown. Please only use the emotions listed here: {emotion_descriptions}"""
-        system_prompt = user_bio + system_prompt
+{user_bio}"""
 
         messages = [
             {"role": "system", "content": system_prompt},
@@ -121,21 +448,64 @@ class AIService:
 
         from data_model import ActivityEmotions
 
-        result = self.structured_completion(messages, ActivityEmotions)
+        result = self.cached_structured_completion(
+            f"activities_emotions:{type}",
+            content,
+            ACTIVITIES_EMOTIONS_PROMPT_VERSION,
+            messages,
+            ActivityEmotions,
+            model,
+            user_bio,
+            call_site="extract_activities_emotions",
+        )
         return result.act_emotions
 
+    def map_concurrently(
+        self,
+        func: Callable[[Any], Any],
+        items: List[Any],
+        max_concurrency: Optional[int] = None,
+    ) -> List[Any]:
+        """
+        Apply ``func`` to every item on a bounded thread pool.
+        Preserves input ordering and captures per-item exceptions instead of
+        aborting the whole batch. Each item runs in a copy of the caller's
+        context so usage is attributed to the caller's user.
+        """
+
+        def run(item):
+            try:
+                return func(item)
+            except Exception as e:
+                return e
+
+        if not items:
+            return []
+
+        workers = max(1, min(max_concurrency or DEFAULT_MAX_CONCURRENCY, len(items)))
+        if workers == 1:
+            return [run(item) for item in items]
+
+        contexts = [contextvars.copy_context() for _ in items]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(
+                executor.map(
+                    lambda context, item: context.run(run, item), contexts, items
+                )
+            )
+
     def extract_value_comparisons(
-        self, content: str, type: str = "journal entry"
+        self, content: str, type: str = "journal entry", model: Optional[str] = None
     ) -> Any:
         """
         Extract value comparisons from content.
         Used by: utils.py get_value_comparisons
         """
-        from values import value_descriptions
+        model = model or self.route_model("extract_value_comparisons")
+        prompt_suffix = f"""{VALUE_CATALOG}
 
-        prompt_suffix = f"""Based on the {type}, make list of value comparisons such as superior A > inferior B (A not equal to B).
-Only include if there is sufficient evidence. Only use the values from the list below: 
-{value_descriptions}
+Based on the {type}, make list of value comparisons such as superior A > inferior B (A not equal to B).
+Only include if there is sufficient evidence. Only use the values listed above.
 Please mention the supporting evidence/extract from the material in the ref field.
 """
 
@@ -146,32 +516,127 @@ Please mention the supporting evidence/extract from the material in the ref fiel
 
         from data_model import ValuesComparisons
 
-        result = self.structured_completion(messages, ValuesComparisons)
+        result = self.cached_structured_completion(
+            f"value_comparisons:{type}",
+            content,
+            VALUE_COMPARISONS_PROMPT_VERSION,
+            messages,
+            ValuesComparisons,
+            model,
+            call_site="extract_value_comparisons",
+        )
         return result.values
 
-    def chat_thread(self, messages: List[Dict[str, str]], model: str = "gpt-4") -> str:
+    def extract_entry_analysis(
+        self,
+        content: str,
+        user_bio: str,
+        type: str = "journal entry",
+        model: Optional[str] = None,
+    ) -> Any:
         """
-        Chat thread completion with Helicone tracking.
-        Used by: all chat pages for conversations
+        Extract activities/emotions and value comparisons in a single call.
+        Returns an EntryAnalysis with both ``act_emotions`` and ``values``.
+        Used by: utils.py analyze_entries
         """
-        return self.chat_completion(messages, model, temperature=0.7, use_helicone=True)
+        model = model or self.route_model("extract_entry_analysis")
+        system_prompt = f"""{EMOTION_CATALOG}
 
-    def retry_on_error(self, max_retries: int = 3):
-        """Decorator for retrying failed AI calls."""
+{VALUE_CATALOG}
+
+Analyze the following {type} in two parts.
+1. act_emotions: Extract the {type} into a list of salient ActivityEmotions, and how the user feels about that detailed activity and their outcome (please be explicit and complete), if unknown say unknown. Please only use the emotions listed above.
+2. values: Make list of value comparisons such as superior A > inferior B (A not equal to B).
+Only include if there is sufficient evidence. Only use the values listed above.
+Please mention the supporting evidence/extract from the material in the ref field.
+
+{user_bio}"""
+
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": content},
+        ]
 
-        def decorator(func):
-            def wrapper(*args, **kwargs):
-                for i in range(1, max_retries + 1):
-                    try:
-                        return func(*args, **kwargs)
-                    except Exception as e:
-                        print(f"AI call attempt {i} of {max_retries} failed: {e}")
-                        if i == max_retries:
-                            raise
+        from data_model import EntryAnalysis
+
+        return self.cached_structured_completion(
+            f"entry_analysis:{type}",
+            content,
+            ENTRY_ANALYSIS_PROMPT_VERSION,
+            messages,
+            EntryAnalysis,
+            model,
+            user_bio,
+            call_site="extract_entry_analysis",
+        )
 
-            return wrapper
+    def summarize_conversation(
+        self,
+        summary: str,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+    ) -> str:
+        """
+        Extend a running conversation summary with new messages.
+        Used by: ConversationContext when a chat thread outgrows its budget
+        """
+        model = model or self.route_model("summarize_conversation")
+        transcript = "\n".join(
+            f"{message['role']}: {message['content']}" for message in messages
+        )
+        max_words = max(self.conversation_context.summary_tokens * 3 // 4, 50)
+        return self.chat_completion(
+            [
+                {
+                    "role": "system",
+                    "content": CONVERSATION_SUMMARY_PROMPT.format(max_words=max_words),
+                },
+                {
+                    "role": "user",
+                    "content": f"Current summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}",
+                },
+            ],
+            model,
+            temperature=0,
+            use_helicone=True,
+            call_site="summarize_conversation",
+        )
 
-        return decorator
+    def chat_thread(
+        self, messages: List[Dict[str, str]], model: Optional[str] = None
+    ) -> str:
+        """
+        Chat thread completion with Helicone tracking.
+        Older turns are folded into a summary once the thread outgrows its token budget.
+        Used by: all chat pages for conversations
+        """
+        model = model or self.route_model("chat_thread")
+        messages = self.conversation_context.fit(messages, model)
+        return self.chat_completion(
+            messages, model, temperature=0.7, use_helicone=True, call_site="chat_thread"
+        )
+
+    def chat_thread_stream(
+        self, messages: List[Dict[str, str]], model: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Streaming chat thread completion with Helicone tracking.
+        Older turns are folded into a summary once the thread outgrows its token budget.
+        Used by: all chat pages, rendered incrementally by utils.add_chat_message
+        """
+        model = model or self.route_model("chat_thread_stream")
+        messages = self.conversation_context.fit(messages, model)
+        return self.chat_completion_stream(
+            messages,
+            model,
+            temperature=0.7,
+            use_helicone=True,
+            call_site="chat_thread_stream",
+        )
+
+    def retry_on_error(self, max_retries: int = 3):
+        """Decorator retrying failed AI calls with backoff (see RetryPolicy)."""
+        return RetryPolicy(max_retries=max_retries).wrap
 
 
 # Global AI service instance
@@ -179,11 +644,15 @@ ai_service = AIService()
 
 
 # Backward compatibility functions
-def call_openai2_thread(messages: List[Dict[str, str]], model: str = "gpt-4") -> str:
+def call_openai2_thread(
+    messages: List[Dict[str, str]], model: Optional[str] = None
+) -> str:
     """Backward compatibility for chat threads."""
     return ai_service.chat_thread(messages, model)
 
 
-def generate_response(system_prompt: str, input_text: str, model: str = "gpt-4") -> str:
+def generate_response(
+    system_prompt: str, input_text: str, model: Optional[str] = None
+) -> str:
     """Backward compatibility for simple completions."""
     return ai_service.simple_completion(system_prompt, input_text, model)
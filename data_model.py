@@ -22,3 +22,7 @@ class ValuesComparison(BaseModel):
 class ValuesComparisons(BaseModel):
     values: List[ValuesComparison] = Field(..., description="a list of value comparisons (see value's desc for details) which are justified by the content")
 
+
+class EntryAnalysis(ActivityEmotions, ValuesComparisons):
+    # joint response model so a single call per entry fills both activities and value comparisons
+    pass
@@ -1,4 +1,4 @@
-from .database_manager import DatabaseManager
+from .database_manager import DatabaseManager, register_entry_listener
 from .base_provider import DatabaseProvider
 
-__all__ = ['DatabaseManager', 'DatabaseProvider']
\ No newline at end of file
+__all__ = ['DatabaseManager', 'DatabaseProvider', 'register_entry_listener']
\ No newline at end of file
@@ -1,5 +1,8 @@
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
 from typing import Dict, Any, List, Optional, Generator
+from reference_data import reference_data
+from value_ranking import summarize_values
 
 
 class DatabaseProvider(ABC):
@@ -10,12 +13,42 @@ class DatabaseProvider(ABC):
         """Initialize the database connection and create tables if needed."""
         pass
     
+    @property
+    def cache_namespace(self) -> str:
+        """Key separating cached data of different databases in this process."""
+        return f"{self.provider_name}:{getattr(self, 'db_path', '')}"
+    
+    def transaction(self, immediate: bool = False):
+        """Context manager grouping several operations into one transaction.
+
+        Providers without transactional batching run each operation on its own.
+        """
+        return nullcontext()
+    
     # Journal Entries
     @abstractmethod
-    def get_entries(self, user_id: str, not_in_timestamps: List = None, not_in_ids: List = None) -> List[Dict]:
-        """Get journal entries for a user."""
+    def get_entries(self, user_id: str, not_in_timestamps: List = None, not_in_ids: List = None, limit: int = None, offset: int = 0) -> List[Dict]:
+        """Get journal entries for a user, newest first, excluding the given dates/ids."""
+        pass
+    
+    @abstractmethod
+    def get_entry(self, entry_id: str) -> Optional[Dict]:
+        """Get one journal entry (None if missing) with has_activities / has_value_comparisons flags."""
         pass
     
+    def get_entries_without_activities(self, user_id: str, limit: int = None) -> List[Dict]:
+        """Get entries that have no activities yet."""
+        processed_ids = {activity['entry_id'] for activity in self.get_activities(user_id)}
+        return self.get_entries(user_id, not_in_ids=list(processed_ids), limit=limit)
+    
+    def get_entries_without_value_comparisons(self, user_id: str, limit: int = None) -> List[Dict]:
+        """Get entries that have no value comparisons yet."""
+        processed_ids = {
+            instance['entry_id'] for instance in self.get_value_comparison_instances(user_id)
+            if instance.get('entry_id') is not None
+        }
+        return self.get_entries(user_id, not_in_ids=list(processed_ids), limit=limit)
+    
     @abstractmethod
     def add_entry(self, what_happened: str, user_id: str, date: str) -> Dict:
         """Add a new journal entry."""
@@ -47,11 +80,33 @@ class DatabaseProvider(ABC):
         """Add a new activity."""
         pass
     
+    def add_activities_bulk(self, activities_data: List[Any], entry_id: str, user_id: str) -> List[Dict]:
+        """Add several activities for one entry, returning the created rows."""
+        with self.transaction():
+            activities = [self.add_activity(activity_data, entry_id, user_id) for activity_data in activities_data]
+        return [activity for activity in activities if activity]
+    
     @abstractmethod
     def edit_activity(self, activity_id: str, update_payload: Dict) -> Dict:
         """Edit an existing activity."""
         pass
     
+    def apply_activity_changes(self, changes: List[Dict]) -> Dict:
+        """Apply a set of activity changes at once.
+        
+        Each change is {"id": ..., "update": {...}} or {"id": ..., "delete": True}.
+        Returns {"updated": [rows], "deleted": [ids]}.
+        """
+        updated, deleted = [], []
+        with self.transaction():
+            for change in changes:
+                if change.get("delete"):
+                    self.delete_activity(change["id"])
+                    deleted.append(change["id"])
+                elif change.get("update"):
+                    updated.append(self.edit_activity(change["id"], change["update"]))
+        return {"updated": updated, "deleted": deleted}
+    
     @abstractmethod
     def delete_activity(self, activity_id: str) -> Dict:
         """Delete an activity."""
@@ -84,6 +139,15 @@ class DatabaseProvider(ABC):
         """Add a value comparison instance."""
         pass
     
+    def add_value_comparison_instances_bulk(self, value_comps: List[tuple], new_entry: Dict) -> List[Dict]:
+        """Add (value_comp, superior_value_id, inferior_value_id) tuples for one entry, returning the created rows."""
+        with self.transaction():
+            instances = [
+                self.add_value_comparison_instance(value_comp, new_entry, superior_value_id, inferior_value_id)
+                for value_comp, superior_value_id, inferior_value_id in value_comps
+            ]
+        return [instance for instance in instances if instance]
+    
     @abstractmethod
     def edit_value_comparison_instance(self, value_comparison_id: str, update_payload: Dict) -> Dict:
         """Edit a value comparison instance."""
@@ -110,13 +174,28 @@ class DatabaseProvider(ABC):
         """Get pairwise user values as a formatted string."""
         pairwise_comparisons = self.get_value_comparison_instances(user_id)
         comparisons_with_names = []
-        human_values = self.get_human_values()
-        human_values_dict = {value['id']: value['name'] for value in human_values}
+        human_values_dict = reference_data.value_id_to_name(self.cache_namespace, self.get_human_values)
         for comparison in pairwise_comparisons:
             superior_value_name = human_values_dict[comparison["superior_value_id"]]
             inferior_value_name = human_values_dict[comparison["inferior_value_id"]]
             comparisons_with_names.append((superior_value_name, inferior_value_name))
         return "; ".join([f"{a[0]} > {a[1]}" for a in comparisons_with_names])
+
+    def get_user_values_summary(self, user_id: str, token_budget: int = None) -> str:
+        """Get a ranked, token-budgeted summary of the user's values (rejected comparisons excluded)."""
+        human_values_dict = reference_data.value_id_to_name(self.cache_namespace, self.get_human_values)
+        return summarize_values(
+            [
+                (
+                    human_values_dict[comparison["superior_value_id"]],
+                    human_values_dict[comparison["inferior_value_id"]],
+                    comparison.get("created_at"),
+                )
+                for comparison in self.get_value_comparison_instances(user_id)
+                if comparison.get("user_sentiment") != "rejected"
+            ],
+            token_budget=token_budget,
+        )
     
     def get_value_comparison_from_entries(self, user_id: str) -> List[Dict]:
         """Get value comparisons associated with journal entries."""
@@ -0,0 +1,88 @@
+import copy
+import os
+import threading
+import time
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+
+class DataCache:
+    """Process-wide cache of per-user read results with table-based invalidation.
+
+    Every cached value records the tables it was read from. Writes invalidate
+    those tables, either for one user or for everyone when the writer only
+    knows a row id. Values are deep-copied in and out so callers can mutate
+    what they get back. A TTL bounds staleness from writes made outside this
+    process.
+    """
+
+    def __init__(self, ttl_seconds: float = None):
+        self.ttl_seconds = (
+            ttl_seconds
+            if ttl_seconds is not None
+            else float(os.getenv("DATA_CACHE_TTL_SECONDS", "300"))
+        )
+        self._entries = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped by every invalidation; unchanged means no cached data changed."""
+        with self._lock:
+            return self._generation
+
+    def get_or_load(
+        self,
+        namespace: str,
+        user_id: str,
+        key: Hashable,
+        tables: Iterable[str],
+        loader: Callable[[], Any],
+    ) -> Any:
+        """Return the cached value for ``key`` or load, cache and return it."""
+        cache_key = (namespace, user_id, key)
+        now = time.monotonic()
+        with self._lock:
+            hit = self._entries.get(cache_key)
+            if hit is not None and hit[1] > now:
+                return copy.deepcopy(hit[2])
+            generation = self._generation
+
+        value = loader()
+
+        with self._lock:
+            # Skip storing if something was invalidated while we were loading
+            if generation == self._generation:
+                self._entries[cache_key] = (
+                    frozenset(tables),
+                    now + self.ttl_seconds,
+                    copy.deepcopy(value),
+                )
+        return value
+
+    def invalidate(
+        self, namespace: str, tables: Iterable[str], user_id: Optional[str] = None
+    ):
+        """Drop cached values that depend on ``tables`` (for one user or all)."""
+        tables = frozenset(tables)
+        with self._lock:
+            self._generation += 1
+            stale = [
+                cache_key
+                for cache_key, (entry_tables, _, _) in self._entries.items()
+                if cache_key[0] == namespace
+                and (user_id is None or cache_key[1] == user_id)
+                and entry_tables & tables
+            ]
+            for cache_key in stale:
+                del self._entries[cache_key]
+
+    def clear(self):
+        """Drop every cached value."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+# Shared by every DatabaseManager in the process so it survives Streamlit reruns
+data_cache = DataCache()
@@ -1,9 +1,22 @@
 import os
-from typing import Dict, Any, List, Optional
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Iterable, Callable
 from .base_provider import DatabaseProvider
+from .data_cache import data_cache
+from reference_data import reference_data
 from .providers import SQLiteProvider, SupabaseProvider
 from .providers.rds_provider import RDSProvider
 
+# Called with the entry after every add_entry/edit_entry (e.g. to queue its analysis)
+_entry_listeners: List[Callable[[Dict], Any]] = []
+
+
+def register_entry_listener(listener: Callable[[Dict], Any]):
+    """Run ``listener(entry)`` whenever a journal entry is added or edited."""
+    if listener not in _entry_listeners:
+        _entry_listeners.append(listener)
+
 
 class DatabaseManager:
     """Manages database providers and provides a unified interface."""
@@ -14,6 +27,9 @@ class DatabaseManager:
             provider_name = os.getenv("DATABASE_PROVIDER", "sqlite")
         
         self.provider = self._create_provider(provider_name)
+        self.cache = data_cache
+        self._cache_namespace = self.provider.cache_namespace
+        self._local = threading.local()
     
     def _create_provider(self, provider_name: str) -> DatabaseProvider:
         """Create and return the specified database provider."""
@@ -26,35 +42,135 @@ class DatabaseManager:
         else:
             raise ValueError(f"Unknown database provider: {provider_name}")
     
+    @contextmanager
+    def transaction(self, immediate: bool = False):
+        """Group several operations into one transaction where the provider supports it.
+
+        ``immediate`` locks the database for writing from the start (SQLite),
+        for read-check-write sequences that must not race another writer.
+        """
+        outermost = getattr(self._local, "pending", None) is None
+        if outermost:
+            self._local.pending = []
+        try:
+            with self.provider.transaction(immediate=immediate) as conn:
+                yield conn
+        finally:
+            if outermost:
+                pending, self._local.pending = self._local.pending, None
+                # Readers may have cached uncommitted state in the meantime
+                for tables, user_id in pending:
+                    self.cache.invalidate(self._cache_namespace, tables, user_id)
+    
+    # Read cache
+    def _cached(self, user_id: str, key: tuple, tables: Iterable[str], loader: Callable[[], Any]) -> Any:
+        """Serve a per-user read from the shared cache, loading it on a miss."""
+        return self.cache.get_or_load(self._cache_namespace, user_id, key, tables, loader)
+    
+    def _invalidate(self, tables: Iterable[str], user_id: str = None):
+        """Drop cached reads of ``tables`` for ``user_id`` (or all users if unknown)."""
+        tables = tuple(tables)
+        self.cache.invalidate(self._cache_namespace, tables, user_id)
+        pending = getattr(self._local, "pending", None)
+        if pending is not None:
+            pending.append((tables, user_id))
+    
+    def clear_cache(self):
+        """Drop every cached read."""
+        self.cache.clear()
+    
+    def _notify_entry_listeners(self, entry: Optional[Dict]):
+        """Hand a changed entry to the registered listeners; their failures never fail the write."""
+        if not entry:
+            return
+        for listener in _entry_listeners:
+            try:
+                listener(entry)
+            except Exception as e:
+                print(f"Entry listener failed for entry {entry.get('id')}: {e}")
+    
     # Journal Entries
-    def get_entries(self, user_id: str, not_in_timestamps: List = None, not_in_ids: List = None) -> List[Dict]:
-        """Get journal entries for a user."""
-        return self.provider.get_entries(user_id, not_in_timestamps, not_in_ids)
+    def get_entries(self, user_id: str, not_in_timestamps: List = None, not_in_ids: List = None, limit: int = None, offset: int = 0) -> List[Dict]:
+        """Get journal entries for a user, newest first, excluding the given dates/ids."""
+        key = ("get_entries", tuple(not_in_timestamps or ()), tuple(not_in_ids or ()), limit, offset)
+        return self._cached(
+            user_id, key, ("journal_entries",),
+            lambda: self.provider.get_entries(user_id, not_in_timestamps, not_in_ids, limit, offset),
+        )
+    
+    def get_entry(self, entry_id: str) -> Optional[Dict]:
+        """Get one journal entry with its analysis flags, read uncached from the database."""
+        return self.provider.get_entry(entry_id)
+    
+    def get_entries_without_activities(self, user_id: str, limit: int = None) -> List[Dict]:
+        """Get entries that have no activities yet."""
+        return self._cached(
+            user_id, ("get_entries_without_activities", limit), ("journal_entries", "activities"),
+            lambda: self.provider.get_entries_without_activities(user_id, limit),
+        )
+    
+    def get_entries_without_value_comparisons(self, user_id: str, limit: int = None) -> List[Dict]:
+        """Get entries that have no value comparisons yet."""
+        return self._cached(
+            user_id, ("get_entries_without_value_comparisons", limit), ("journal_entries", "value_comparison_instances"),
+            lambda: self.provider.get_entries_without_value_comparisons(user_id, limit),
+        )
     
     def add_entry(self, what_happened: str, user_id: str, date: str) -> Dict:
         """Add a new journal entry."""
-        return self.provider.add_entry(what_happened, user_id, date)
+        entry = self.provider.add_entry(what_happened, user_id, date)
+        self._invalidate(("journal_entries",), user_id)
+        self._notify_entry_listeners(entry)
+        return entry
     
     def edit_entry(self, entry_id: str, what_happened: str) -> Dict:
         """Edit an existing journal entry."""
-        return self.provider.edit_entry(entry_id, what_happened)
+        entry = self.provider.edit_entry(entry_id, what_happened)
+        # Content changes also drop the entry's activities and value comparisons
+        self._invalidate(
+            ("journal_entries", "activities", "value_comparison_instances"),
+            entry.get("user_id") if entry else None,
+        )
+        self._notify_entry_listeners(entry)
+        return entry
     
     # Activities
     def get_activities(self, user_id: str) -> List[Dict]:
         """Get activities for a user."""
-        return self.provider.get_activities(user_id)
+        return self._cached(
+            user_id, ("get_activities",), ("activities",),
+            lambda: self.provider.get_activities(user_id),
+        )
     
     def add_activity(self, activity_data: Any, entry_id: str, user_id: str) -> Optional[Dict]:
         """Add a new activity."""
-        return self.provider.add_activity(activity_data, entry_id, user_id)
+        activity = self.provider.add_activity(activity_data, entry_id, user_id)
+        self._invalidate(("activities",), user_id)
+        return activity
+    
+    def add_activities_bulk(self, activities_data: List[Any], entry_id: str, user_id: str) -> List[Dict]:
+        """Add several activities for one entry, returning the created rows."""
+        activities = self.provider.add_activities_bulk(activities_data, entry_id, user_id)
+        self._invalidate(("activities",), user_id)
+        return activities
     
     def edit_activity(self, activity_id: str, update_payload: Dict) -> Dict:
         """Edit an existing activity."""
-        return self.provider.edit_activity(activity_id, update_payload)
+        activity = self.provider.edit_activity(activity_id, update_payload)
+        self._invalidate(("activities",))
+        return activity
+    
+    def apply_activity_changes(self, changes: List[Dict]) -> Dict:
+        """Apply activity updates ({"id", "update"}) and deletes ({"id", "delete": True}) at once."""
+        result = self.provider.apply_activity_changes(changes)
+        self._invalidate(("activities",))
+        return result
     
     def delete_activity(self, activity_id: str) -> Dict:
         """Delete an activity."""
-        return self.provider.delete_activity(activity_id)
+        result = self.provider.delete_activity(activity_id)
+        self._invalidate(("activities",))
+        return result
     
     # Messages and Threads
     def add_chat_message_DB(self, user_id: str, thread_id: str, role: str, content: str) -> Optional[str]:
@@ -63,24 +179,51 @@ class DatabaseManager:
     
     def add_thread_DB(self, user_id: str, type: str, thread_data: Dict) -> Optional[str]:
         """Add a thread to the database."""
-        return self.provider.add_thread_DB(user_id, type, thread_data)
+        thread_id = self.provider.add_thread_DB(user_id, type, thread_data)
+        self._invalidate(("threads",), user_id)
+        return thread_id
     
     # Value Comparisons
     def get_value_comparison_instances(self, user_id: str) -> List[Dict]:
         """Get value comparison instances for a user."""
-        return self.provider.get_value_comparison_instances(user_id)
+        return self._cached(
+            user_id, ("get_value_comparison_instances",), ("value_comparison_instances",),
+            lambda: self.provider.get_value_comparison_instances(user_id),
+        )
     
     def get_human_values(self) -> List[Dict]:
-        """Get all human values."""
-        return self.provider.get_human_values()
+        """Get all human values (loaded once per process)."""
+        return reference_data.human_values(self._cache_namespace, self.provider.get_human_values)
+    
+    def get_value_ids_by_name(self) -> Dict[str, Any]:
+        """Map of human value name to id."""
+        return reference_data.value_name_to_id(self._cache_namespace, self.provider.get_human_values)
+    
+    def get_value_names_by_id(self) -> Dict[Any, str]:
+        """Map of human value id to name."""
+        return reference_data.value_id_to_name(self._cache_namespace, self.provider.get_human_values)
+    
+    def refresh_reference_data(self):
+        """Reload human values and emotion metadata on next access."""
+        reference_data.refresh()
     
     def add_value_comparison_instance(self, value_comp: Any, new_entry: Dict, superior_value_id: str, inferior_value_id: str) -> Optional[Dict]:
         """Add a value comparison instance."""
-        return self.provider.add_value_comparison_instance(value_comp, new_entry, superior_value_id, inferior_value_id)
+        instance = self.provider.add_value_comparison_instance(value_comp, new_entry, superior_value_id, inferior_value_id)
+        self._invalidate(("value_comparison_instances",), new_entry["user_id"])
+        return instance
+    
+    def add_value_comparison_instances_bulk(self, value_comps: List[tuple], new_entry: Dict) -> List[Dict]:
+        """Add (value_comp, superior_value_id, inferior_value_id) tuples for one entry, returning the created rows."""
+        instances = self.provider.add_value_comparison_instances_bulk(value_comps, new_entry)
+        self._invalidate(("value_comparison_instances",), new_entry["user_id"])
+        return instances
     
     def edit_value_comparison_instance(self, value_comparison_id: str, update_payload: Dict) -> Dict:
         """Edit a value comparison instance."""
-        return self.provider.edit_value_comparison_instance(value_comparison_id, update_payload)
+        instance = self.provider.edit_value_comparison_instance(value_comparison_id, update_payload)
+        self._invalidate(("value_comparison_instances",), instance.get("user_id") if instance else None)
+        return instance
     
     # Utility Methods
     def merge_activities_and_entries(self, activities: List[Dict], entries: List[Dict]) -> List[tuple]:
@@ -89,32 +232,61 @@ class DatabaseManager:
     
     def get_activities_and_entries(self, user_id: str) -> List[tuple]:
         """Get activities merged with their entries."""
-        return self.provider.get_activities_and_entries(user_id)
+        return self._cached(
+            user_id, ("get_activities_and_entries",), ("activities", "journal_entries"),
+            lambda: self.provider.get_activities_and_entries(user_id),
+        )
     
     def get_pairwise_user_values(self, user_id: str) -> str:
         """Get pairwise user values as a formatted string."""
-        return self.provider.get_pairwise_user_values(user_id)
+        return self._cached(
+            user_id, ("get_pairwise_user_values",), ("value_comparison_instances",),
+            lambda: self.provider.get_pairwise_user_values(user_id),
+        )
+    
+    def get_user_values_summary(self, user_id: str, token_budget: int = None) -> str:
+        """Get a ranked, token-budgeted summary of the user's values for prompts."""
+        return self._cached(
+            user_id, ("get_user_values_summary", token_budget), ("value_comparison_instances",),
+            lambda: self.provider.get_user_values_summary(user_id, token_budget),
+        )
     
     def get_value_comparison_from_entries(self, user_id: str) -> List[Dict]:
         """Get value comparisons associated with journal entries."""
-        return self.provider.get_value_comparison_from_entries(user_id)
+        return self._cached(
+            user_id, ("get_value_comparison_from_entries",), ("value_comparison_instances", "journal_entries"),
+            lambda: self.provider.get_value_comparison_from_entries(user_id),
+        )
     
     def get_value_comparison_from_threads(self, user_id: str) -> List[Dict]:
         """Get value comparisons associated with threads (Supabase only)."""
         if hasattr(self.provider, 'get_value_comparison_from_threads'):
-            return self.provider.get_value_comparison_from_threads(user_id)
+            return self._cached(
+                user_id, ("get_value_comparison_from_threads",), ("value_comparison_instances", "threads"),
+                lambda: self.provider.get_value_comparison_from_threads(user_id),
+            )
         return []
     
     def encrypt_journal(self, user_id: str):
         """Encrypt journal entries (Supabase only)."""
         if hasattr(self.provider, 'encrypt_journal'):
-            return self.provider.encrypt_journal(user_id)
+            return self._encrypt_journal(user_id)
         raise NotImplementedError("Encryption not supported by current provider")
     
+    def _encrypt_journal(self, user_id: str):
+        try:
+            yield from self.provider.encrypt_journal(user_id)
+        finally:
+            self._invalidate(("journal_entries",), user_id)
+    
     def delete_activities_by_entry(self, entry_id: str) -> int:
         """Delete all activities associated with a journal entry."""
-        return self.provider.delete_activities_by_entry(entry_id)
+        deleted_count = self.provider.delete_activities_by_entry(entry_id)
+        self._invalidate(("activities",))
+        return deleted_count
     
     def delete_value_comparisons_by_entry(self, entry_id: str) -> int:
         """Delete all value comparisons associated with a journal entry."""
-        return self.provider.delete_value_comparisons_by_entry(entry_id)
\ No newline at end of file
+        deleted_count = self.provider.delete_value_comparisons_by_entry(entry_id)
+        self._invalidate(("value_comparison_instances",))
+        return deleted_count
\ No newline at end of file
@@ -19,10 +19,14 @@ class RDSProvider(DatabaseProvider):
         # TODO: Implement RDS initialization
         raise NotImplementedError("RDS provider not yet implemented")
     
-    def get_entries(self, user_id: str, not_in_timestamps: List = None, not_in_ids: List = None) -> List[Dict]:
+    def get_entries(self, user_id: str, not_in_timestamps: List = None, not_in_ids: List = None, limit: int = None, offset: int = 0) -> List[Dict]:
         """Get journal entries for a user."""
         raise NotImplementedError("RDS provider not yet implemented")
     
+    def get_entry(self, entry_id: str) -> Optional[Dict]:
+        """Get one journal entry with its analysis flags."""
+        raise NotImplementedError("RDS provider not yet implemented")
+    
     def add_entry(self, what_happened: str, user_id: str, date: str) -> Dict:
         """Add a new journal entry."""
         raise NotImplementedError("RDS provider not yet implemented")
@@ -0,0 +1,115 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+
+class SQLiteConnectionPool:
+    """Queue-based pool of long-lived SQLite connections.
+
+    Connections are opened lazily (up to ``max_size``), configured once with
+    WAL journaling and tuned cache/mmap pragmas, and handed out to whichever
+    thread needs one, so they are safe to use from Streamlit's script threads.
+    """
+
+    _pools: Dict[str, "SQLiteConnectionPool"] = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(
+        self,
+        db_path: str,
+        max_size: int = None,
+        acquire_timeout: float = 30.0,
+        cache_size_kib: int = None,
+        mmap_size: int = None,
+    ):
+        self.db_path = db_path
+        self.max_size = max_size or int(os.getenv("SQLITE_POOL_SIZE", "8"))
+        self.acquire_timeout = acquire_timeout
+        self.cache_size_kib = cache_size_kib or int(
+            os.getenv("SQLITE_CACHE_SIZE_KIB", "16384")
+        )
+        self.mmap_size = (
+            mmap_size
+            if mmap_size is not None
+            else int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+        )
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_path(cls, db_path: str) -> "SQLiteConnectionPool":
+        """Return the process-wide pool for ``db_path``, creating it if needed."""
+        key = os.path.abspath(db_path)
+        with cls._pools_lock:
+            pool = cls._pools.get(key)
+            if pool is None:
+                pool = cls._pools[key] = cls(db_path)
+            return pool
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open and configure a new connection."""
+        conn = sqlite3.connect(
+            self.db_path, timeout=self.acquire_timeout, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kib)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.max_size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"No SQLite connection available for {self.db_path} "
+                f"after {self.acquire_timeout}s"
+            )
+
+    def _release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of the ``with`` block."""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def close(self):
+        """Close all idle connections."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
@@ -1,9 +1,46 @@
-import sqlite3
 import json
 import os
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from ..base_provider import DatabaseProvider
+from .sqlite_pool import SQLiteConnectionPool
+
+
+# Schema migrations applied in order on top of the base tables. The index of a
+# migration plus one is the schema version it produces (tracked in
+# PRAGMA user_version), so only append new migrations, never edit old ones.
+MIGRATIONS = [
+    # 1: secondary indexes for per-user reads and entry/thread joins
+    [
+        "CREATE INDEX IF NOT EXISTS idx_journal_entries_user_created ON journal_entries (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_activities_user ON activities (user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_activities_entry ON activities (entry_id)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_thread ON messages (thread_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_threads_user ON threads (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_value_comparisons_user_type_entry ON value_comparison_instances (user_id, type, entry_id)",
+        "CREATE INDEX IF NOT EXISTS idx_value_comparisons_entry ON value_comparison_instances (entry_id)",
+        "CREATE INDEX IF NOT EXISTS idx_value_comparisons_thread ON value_comparison_instances (thread_id)",
+    ],
+]
+
+
+def _to_sql(v: Any):
+    """Convert a payload value to something sqlite3 can bind."""
+    if isinstance(v, (dict, list)):
+        return json.dumps(v, ensure_ascii=False)
+    if isinstance(v, bool):
+        return int(v)
+    return v
+
+
+def _row_with_data(row) -> Dict:
+    """Convert a row to a dict with its ``data`` JSON column decoded."""
+    record = dict(row)
+    if isinstance(record.get("data"), str):
+        record["data"] = json.loads(record["data"])
+    return record
 
 
 class SQLiteProvider(DatabaseProvider):
@@ -11,15 +48,44 @@ class SQLiteProvider(DatabaseProvider):
 
     def __init__(self, db_path: str = "dwell.db"):
         self.db_path = db_path
+        self.pool = SQLiteConnectionPool.for_path(db_path)
+        self._local = threading.local()
         self.initialize()
 
     @property
     def provider_name(self) -> str:
         return "sqlite"
 
+    @contextmanager
+    def transaction(self, immediate: bool = False):
+        """Run several operations on one pooled connection in a single transaction.
+
+        Nested calls on the same thread join the outermost transaction, which
+        commits on success and rolls back on error. ``immediate`` takes the
+        write lock up front, so reads inside the block cannot be invalidated
+        by another writer before the block's own writes.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield conn
+            return
+
+        with self.pool.connection() as conn:
+            self._local.conn = conn
+            try:
+                if immediate:
+                    conn.execute("BEGIN IMMEDIATE")
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                self._local.conn = None
+
     def initialize(self):
         """Initialize SQLite database and create tables."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.transaction() as conn:
             conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS journal_entries (
@@ -106,13 +172,25 @@ class SQLiteProvider(DatabaseProvider):
                 )
             """
             )
-
-            conn.commit()
+            self._migrate(conn)
             self._seed_human_values()
 
+    def _migrate(self, conn):
+        """Apply pending schema migrations and record the new schema version."""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target_version, statements in enumerate(
+            MIGRATIONS[version:], start=version + 1
+        ):
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {target_version}")
+            print(f"Migrated {self.db_path} to schema version {target_version}")
+        if version < len(MIGRATIONS):
+            conn.execute("ANALYZE")
+
     def _seed_human_values(self):
         """Seed the human values table if empty."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.transaction() as conn:
             cursor = conn.execute("SELECT COUNT(*) FROM human_values")
             if cursor.fetchone()[0] == 0:
                 from values import value_descriptions
@@ -122,39 +200,90 @@ class SQLiteProvider(DatabaseProvider):
                         "INSERT INTO human_values (name, description) VALUES (?, ?)",
                         (name, desc),
                     )
-                conn.commit()
 
     def get_entries(
-        self, user_id: str, not_in_timestamps: List = None, not_in_ids: List = None
+        self,
+        user_id: str,
+        not_in_timestamps: List = None,
+        not_in_ids: List = None,
+        limit: int = None,
+        offset: int = 0,
     ) -> List[Dict]:
-        """Get journal entries for a user."""
-        not_in_timestamps = not_in_timestamps or []
-        not_in_ids = not_in_ids or []
-
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
+        """Get journal entries for a user, newest first, excluding the given dates/ids."""
+        query = "SELECT * FROM journal_entries WHERE user_id = ?"
+        params = [user_id]
+        if not_in_timestamps:
+            query += " AND date NOT IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps(sorted(set(map(str, not_in_timestamps)))))
+        if not_in_ids:
+            query += " AND id NOT IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps(sorted(set(int(i) for i in not_in_ids))))
+        return self._query_entries(query, params, limit, offset)
+
+    def get_entry(self, entry_id: str) -> Optional[Dict]:
+        """Get one journal entry with has_activities / has_value_comparisons flags."""
+        with self.transaction() as conn:
+            row = conn.execute(
                 """
-                SELECT * FROM journal_entries 
-                WHERE user_id = ? 
-                ORDER BY created_at DESC
+                SELECT e.*,
+                    EXISTS (SELECT 1 FROM activities a WHERE a.entry_id = e.id)
+                        AS has_activities,
+                    EXISTS (
+                        SELECT 1 FROM value_comparison_instances v WHERE v.entry_id = e.id
+                    ) AS has_value_comparisons
+                FROM journal_entries e WHERE e.id = ?
             """,
-                (user_id,),
+                (entry_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        entry = _row_with_data(row)
+        entry["has_activities"] = bool(entry["has_activities"])
+        entry["has_value_comparisons"] = bool(entry["has_value_comparisons"])
+        return entry
+
+    def get_entries_without_activities(
+        self, user_id: str, limit: int = None
+    ) -> List[Dict]:
+        """Get entries that have no activities yet (anti-join)."""
+        return self._query_entries(
+            """
+            SELECT e.* FROM journal_entries e
+            WHERE e.user_id = ?
+            AND NOT EXISTS (SELECT 1 FROM activities a WHERE a.entry_id = e.id)
+        """,
+            [user_id],
+            limit,
+        )
+
+    def get_entries_without_value_comparisons(
+        self, user_id: str, limit: int = None
+    ) -> List[Dict]:
+        """Get entries that have no value comparisons yet (anti-join)."""
+        return self._query_entries(
+            """
+            SELECT e.* FROM journal_entries e
+            WHERE e.user_id = ?
+            AND NOT EXISTS (
+                SELECT 1 FROM value_comparison_instances v WHERE v.entry_id = e.id
             )
+        """,
+            [user_id],
+            limit,
+        )
 
-            entries = []
-            for row in cursor.fetchall():
-                entry = dict(row)
-                entry["data"] = json.loads(entry["data"])
-
-                if entry["date"] in not_in_timestamps:
-                    break
-                if entry["id"] in not_in_ids:
-                    break
-
-                entries.append(entry)
+    def _query_entries(
+        self, query: str, params: List, limit: int = None, offset: int = 0
+    ) -> List[Dict]:
+        """Run an entries query ordered newest first with optional paging."""
+        query += " ORDER BY created_at DESC, id DESC"
+        if limit is not None or offset:
+            query += " LIMIT ? OFFSET ?"
+            params = list(params) + [-1 if limit is None else limit, offset]
 
-            return entries
+        with self.transaction() as conn:
+            cursor = conn.execute(query, params)
+            return [_row_with_data(row) for row in cursor.fetchall()]
 
     def add_entry(self, what_happened: str, user_id: str, date: str) -> Dict:
         """Add a new journal entry."""
@@ -162,7 +291,7 @@ class SQLiteProvider(DatabaseProvider):
 
         content_hash = hashlib.sha256(what_happened.encode()).hexdigest()
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self.transaction() as conn:
             cursor = conn.execute(
                 """
                 INSERT INTO journal_entries (user_id, date, what_happened, content_hash, data)
@@ -172,7 +301,6 @@ class SQLiteProvider(DatabaseProvider):
             )
 
             entry_id = cursor.lastrowid
-            conn.commit()
 
             return {
                 "id": entry_id,
@@ -189,9 +317,8 @@ class SQLiteProvider(DatabaseProvider):
 
         new_content_hash = hashlib.sha256(what_happened.encode()).hexdigest()
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self.transaction() as conn:
             # Get current entry to check if content changed
-            conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 "SELECT * FROM journal_entries WHERE id = ?", (entry_id,)
             )
@@ -215,7 +342,6 @@ class SQLiteProvider(DatabaseProvider):
             """,
                 (what_happened, new_content_hash, entry_id),
             )
-            conn.commit()
 
             # Return updated entry
             cursor = conn.execute(
@@ -227,8 +353,7 @@ class SQLiteProvider(DatabaseProvider):
 
     def get_activities(self, user_id: str) -> List[Dict]:
         """Get activities for a user."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self.transaction() as conn:
             cursor = conn.execute(
                 "SELECT * FROM activities WHERE user_id = ?", (user_id,)
             )
@@ -239,11 +364,33 @@ class SQLiteProvider(DatabaseProvider):
                 activities.append(activity)
             return activities
 
+    def get_activities_and_entries(self, user_id: str) -> List[tuple]:
+        """Get activities with their entry date in one indexed join, newest first."""
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                """
+                SELECT a.id, a.user_id, a.activity, a.activity_raw, a.emotions,
+                       a.entry_id, a.data, e.date AS entry_date
+                FROM activities a
+                JOIN journal_entries e ON e.id = a.entry_id
+                WHERE a.user_id = ?
+                ORDER BY e.date DESC, a.id
+            """,
+                (user_id,),
+            )
+            merged_data = []
+            for row in cursor.fetchall():
+                activity = dict(row)
+                entry_date = activity.pop("entry_date")
+                activity["data"] = json.loads(activity["data"])
+                merged_data.append((activity, entry_date))
+            return merged_data
+
     def add_activity(
         self, activity_data: Any, entry_id: str, user_id: str
     ) -> Optional[Dict]:
         """Add a new activity."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.transaction() as conn:
             cursor = conn.execute(
                 """
                 INSERT INTO activities (user_id, activity, activity_raw, emotions, entry_id, data)
@@ -260,7 +407,6 @@ class SQLiteProvider(DatabaseProvider):
             )
 
             activity_id = cursor.lastrowid
-            conn.commit()
 
             return {
                 "id": activity_id,
@@ -272,24 +418,64 @@ class SQLiteProvider(DatabaseProvider):
                 "data": {"reviewed": False},
             }
 
-    def edit_activity(self, activity_id: str, update_payload: Dict) -> Dict:
-        """Edit an existing activity."""
+    def add_activities_bulk(
+        self, activities_data: List[Any], entry_id: str, user_id: str
+    ) -> List[Dict]:
+        """Add several activities for one entry with a single executemany."""
+        activities = [
+            {
+                "user_id": user_id,
+                "activity": activity_data.activity,
+                "activity_raw": activity_data.activity_raw,
+                "emotions": activity_data.emotion.name,
+                "entry_id": entry_id,
+                "data": {"reviewed": False},
+            }
+            for activity_data in activities_data
+        ]
+        if not activities:
+            return []
+
+        with self.transaction() as conn:
+            conn.executemany(
+                """
+                INSERT INTO activities (user_id, activity, activity_raw, emotions, entry_id, data)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """,
+                [
+                    (
+                        a["user_id"],
+                        a["activity"],
+                        a["activity_raw"],
+                        a["emotions"],
+                        a["entry_id"],
+                        json.dumps(a["data"]),
+                    )
+                    for a in activities
+                ],
+            )
+            self._assign_inserted_ids(conn, activities)
+            return activities
+
+    def _assign_inserted_ids(self, conn, rows: List[Dict]):
+        """Set ids on rows just inserted by executemany in the current transaction.
 
-        def to_sql(v: Any):
-            if isinstance(v, (dict, list)):
-                return json.dumps(v, ensure_ascii=False)
-            if isinstance(v, bool):
-                return int(v)
-            return v
+        AUTOINCREMENT rowids inserted in one write transaction are consecutive,
+        so they end at last_insert_rowid().
+        """
+        last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        first_id = last_id - len(rows) + 1
+        for offset, row in enumerate(rows):
+            row["id"] = first_id + offset
 
-        with sqlite3.connect(self.db_path) as conn:
+    def edit_activity(self, activity_id: str, update_payload: Dict) -> Dict:
+        """Edit an existing activity."""
+        with self.transaction() as conn:
             set_clause = ", ".join(f"{k} = ?" for k in update_payload.keys())
-            values = [to_sql(v) for v in update_payload.values()] + [activity_id]
+            values = [_to_sql(v) for v in update_payload.values()] + [activity_id]
 
             conn.execute(f"UPDATE activities SET {set_clause} WHERE id = ?", values)
-            conn.commit()
 
-            conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 "SELECT * FROM activities WHERE id = ?", (activity_id,)
             )
@@ -305,18 +491,60 @@ class SQLiteProvider(DatabaseProvider):
 
             return result
 
+    def apply_activity_changes(self, changes: List[Dict]) -> Dict:
+        """Apply activity updates and deletes in one transaction.
+
+        Updates sharing the same columns go through one executemany, deletes
+        through another, and the updated rows are read back with one select.
+        """
+        updates_by_columns = {}
+        deleted_ids = []
+        for change in changes:
+            if change.get("delete"):
+                deleted_ids.append(change["id"])
+            elif change.get("update"):
+                columns = tuple(change["update"].keys())
+                updates_by_columns.setdefault(columns, []).append(
+                    [_to_sql(v) for v in change["update"].values()] + [change["id"]]
+                )
+
+        with self.transaction() as conn:
+            for columns, rows in updates_by_columns.items():
+                set_clause = ", ".join(f"{k} = ?" for k in columns)
+                conn.executemany(
+                    f"UPDATE activities SET {set_clause} WHERE id = ?", rows
+                )
+            if deleted_ids:
+                conn.executemany(
+                    "DELETE FROM activities WHERE id = ?",
+                    [(activity_id,) for activity_id in deleted_ids],
+                )
+
+            updated_ids = [row[-1] for rows in updates_by_columns.values() for row in rows]
+            updated = []
+            if updated_ids:
+                cursor = conn.execute(
+                    "SELECT * FROM activities WHERE id IN (SELECT value FROM json_each(?))",
+                    (json.dumps([int(i) for i in updated_ids]),),
+                )
+                for row in cursor.fetchall():
+                    activity = dict(row)
+                    activity["data"] = json.loads(activity["data"])
+                    updated.append(activity)
+
+            return {"updated": updated, "deleted": deleted_ids}
+
     def delete_activity(self, activity_id: str) -> Dict:
         """Delete an activity."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.transaction() as conn:
             conn.execute("DELETE FROM activities WHERE id = ?", (activity_id,))
-            conn.commit()
             return {"deleted": True, "id": activity_id}
 
     def add_chat_message_DB(
         self, user_id: str, thread_id: str, role: str, content: str
     ) -> Optional[str]:
         """Add a chat message to the database."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.transaction() as conn:
             cursor = conn.execute(
                 """
                 INSERT INTO messages (user_id, thread_id, role, message_text)
@@ -326,14 +554,13 @@ class SQLiteProvider(DatabaseProvider):
             )
 
             message_id = cursor.lastrowid
-            conn.commit()
             return str(message_id)
 
     def add_thread_DB(
         self, user_id: str, type: str, thread_data: Dict
     ) -> Optional[str]:
         """Add a thread to the database."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.transaction() as conn:
             cursor = conn.execute(
                 """
                 INSERT INTO threads (user_id, type, data)
@@ -343,13 +570,11 @@ class SQLiteProvider(DatabaseProvider):
             )
 
             thread_id = cursor.lastrowid
-            conn.commit()
             return str(thread_id)
 
     def get_value_comparison_instances(self, user_id: str) -> List[Dict]:
         """Get value comparison instances for a user."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self.transaction() as conn:
             cursor = conn.execute(
                 """
                 SELECT * FROM value_comparison_instances 
@@ -365,10 +590,30 @@ class SQLiteProvider(DatabaseProvider):
                 instances.append(instance)
             return instances
 
+    def get_value_comparison_from_entries(self, user_id: str) -> List[Dict]:
+        """Get value comparisons with their entry date in one indexed join, newest first."""
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                """
+                SELECT v.id, v.user_id, v.type, v.superior_value_id, v.inferior_value_id,
+                       v.reason, v.entry_id, v.data, v.user_sentiment, e.date
+                FROM value_comparison_instances v
+                JOIN journal_entries e ON e.id = v.entry_id
+                WHERE v.user_id = ? AND v.type = 'entry'
+                ORDER BY e.date DESC, v.id
+            """,
+                (user_id,),
+            )
+            value_comparisons = []
+            for row in cursor.fetchall():
+                instance = dict(row)
+                instance["data"] = json.loads(instance["data"])
+                value_comparisons.append(instance)
+            return value_comparisons
+
     def get_human_values(self) -> List[Dict]:
         """Get all human values."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self.transaction() as conn:
             cursor = conn.execute("SELECT * FROM human_values")
             return [dict(row) for row in cursor.fetchall()]
 
@@ -380,7 +625,7 @@ class SQLiteProvider(DatabaseProvider):
         inferior_value_id: str,
     ) -> Optional[Dict]:
         """Add a value comparison instance."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.transaction() as conn:
             cursor = conn.execute(
                 """
                 INSERT INTO value_comparison_instances 
@@ -400,7 +645,6 @@ class SQLiteProvider(DatabaseProvider):
             )
 
             comparison_id = cursor.lastrowid
-            conn.commit()
 
             return {
                 "id": comparison_id,
@@ -414,11 +658,55 @@ class SQLiteProvider(DatabaseProvider):
                 "user_sentiment": "undecided",
             }
 
+    def add_value_comparison_instances_bulk(
+        self, value_comps: List[tuple], new_entry: Dict
+    ) -> List[Dict]:
+        """Add (value_comp, superior_value_id, inferior_value_id) tuples for one entry with a single executemany."""
+        instances = [
+            {
+                "user_id": new_entry["user_id"],
+                "type": "entry",
+                "superior_value_id": superior_value_id,
+                "inferior_value_id": inferior_value_id,
+                "reason": value_comp.reason,
+                "entry_id": new_entry["id"],
+                "data": {"entry_extract": value_comp.ref},
+                "user_sentiment": "undecided",
+            }
+            for value_comp, superior_value_id, inferior_value_id in value_comps
+        ]
+        if not instances:
+            return []
+
+        with self.transaction() as conn:
+            conn.executemany(
+                """
+                INSERT INTO value_comparison_instances 
+                (user_id, type, superior_value_id, inferior_value_id, reason, entry_id, data, user_sentiment)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                [
+                    (
+                        i["user_id"],
+                        i["type"],
+                        i["superior_value_id"],
+                        i["inferior_value_id"],
+                        i["reason"],
+                        i["entry_id"],
+                        json.dumps(i["data"]),
+                        i["user_sentiment"],
+                    )
+                    for i in instances
+                ],
+            )
+            self._assign_inserted_ids(conn, instances)
+            return instances
+
     def edit_value_comparison_instance(
         self, value_comparison_id: str, update_payload: Dict
     ) -> Dict:
         """Edit a value comparison instance."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.transaction() as conn:
             set_clause = ", ".join([f"{k} = ?" for k in update_payload.keys()])
             values = list(update_payload.values()) + [value_comparison_id]
 
@@ -426,9 +714,7 @@ class SQLiteProvider(DatabaseProvider):
                 f"UPDATE value_comparison_instances SET {set_clause} WHERE id = ?",
                 values,
             )
-            conn.commit()
 
-            conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 "SELECT * FROM value_comparison_instances WHERE id = ?",
                 (value_comparison_id,),
@@ -437,22 +723,20 @@ class SQLiteProvider(DatabaseProvider):
 
     def delete_activities_by_entry(self, entry_id: str) -> int:
         """Delete all activities associated with a journal entry."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.transaction() as conn:
             cursor = conn.execute(
                 "DELETE FROM activities WHERE entry_id = ?", (entry_id,)
             )
             deleted_count = cursor.rowcount
-            conn.commit()
             print(f"Deleted {deleted_count} activities for entry {entry_id}")
             return deleted_count
 
     def delete_value_comparisons_by_entry(self, entry_id: str) -> int:
         """Delete all value comparisons associated with a journal entry."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.transaction() as conn:
             cursor = conn.execute(
                 "DELETE FROM value_comparison_instances WHERE entry_id = ?", (entry_id,)
             )
             deleted_count = cursor.rowcount
-            conn.commit()
             print(f"Deleted {deleted_count} value comparisons for entry {entry_id}")
             return deleted_count
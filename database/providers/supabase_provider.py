@@ -4,6 +4,45 @@ from ..base_provider import DatabaseProvider
 from supabase import create_client, Client
 
 
+# Run once in the Supabase SQL editor. Applies a batch of activity changes,
+# [{"id", "update": {column: value}, "delete": bool}], in one statement: only
+# the columns present in "update" are set, so concurrent edits to other
+# columns are kept, and updates and deletes commit or fail together.
+APPLY_ACTIVITY_CHANGES_SQL = """
+create or replace function apply_activity_changes(changes jsonb)
+returns jsonb
+language sql
+security invoker
+as $$
+  with change as (
+    select c->>'id' as id,
+           coalesce(c->'update', '{}'::jsonb) as upd,
+           coalesce((c->>'delete')::boolean, false) as del
+    from jsonb_array_elements(changes) as c
+  ),
+  updated as (
+    update activities a set
+      activity = case when change.upd ? 'activity' then change.upd->>'activity' else a.activity end,
+      activity_raw = case when change.upd ? 'activity_raw' then change.upd->>'activity_raw' else a.activity_raw end,
+      emotions = case when change.upd ? 'emotions' then change.upd->>'emotions' else a.emotions end,
+      data = case when change.upd ? 'data' then change.upd->'data' else a.data end
+    from change
+    where a.id::text = change.id and not change.del and change.upd <> '{}'::jsonb
+    returning a.*
+  ),
+  deleted as (
+    delete from activities a using change
+    where a.id::text = change.id and change.del
+    returning a.id
+  )
+  select jsonb_build_object(
+    'updated', coalesce((select jsonb_agg(to_jsonb(u)) from updated u), '[]'::jsonb),
+    'deleted', coalesce((select jsonb_agg(d.id) from deleted d), '[]'::jsonb)
+  );
+$$;
+"""
+
+
 class SupabaseProvider(DatabaseProvider):
     """Supabase database provider wrapping existing functionality."""
     
@@ -21,24 +60,55 @@ class SupabaseProvider(DatabaseProvider):
             os.getenv("SUPABASE_KEY")
         )
     
-    def get_entries(self, user_id: str, not_in_timestamps: List = None, not_in_ids: List = None) -> List[Dict]:
-        """Get journal entries for a user."""
-        not_in_timestamps = not_in_timestamps or []
-        not_in_ids = not_in_ids or []
-        
-        response = self.client.table("journal_entries")\
+    def get_entries(self, user_id: str, not_in_timestamps: List = None, not_in_ids: List = None, limit: int = None, offset: int = 0) -> List[Dict]:
+        """Get journal entries for a user, newest first, excluding the given dates/ids."""
+        query = self.client.table("journal_entries")\
             .select("*")\
+            .eq("user_id", user_id)
+        if not_in_timestamps:
+            query = query.not_.in_("date", sorted(set(map(str, not_in_timestamps))))
+        if not_in_ids:
+            query = query.not_.in_("id", sorted(set(not_in_ids)))
+        query = query.order("created_at", desc=True)
+        if limit is not None:
+            query = query.range(offset, offset + limit - 1)
+        elif offset:
+            query = query.offset(offset)
+        return query.execute().data
+    
+    def get_entry(self, entry_id: str) -> Optional[Dict]:
+        """Get one journal entry with has_activities / has_value_comparisons flags."""
+        response = self.client.table("journal_entries")\
+            .select("*, activities(id), value_comparison_instances(id)")\
+            .eq("id", entry_id)\
+            .execute()
+        if not response.data:
+            return None
+        entry = response.data[0]
+        entry["has_activities"] = bool(entry.pop("activities", None))
+        entry["has_value_comparisons"] = bool(entry.pop("value_comparison_instances", None))
+        return entry
+    
+    def get_entries_without_activities(self, user_id: str, limit: int = None) -> List[Dict]:
+        """Get entries that have no activities yet (anti-join on the embedded resource)."""
+        return self._get_unprocessed_entries(user_id, "activities", limit)
+    
+    def get_entries_without_value_comparisons(self, user_id: str, limit: int = None) -> List[Dict]:
+        """Get entries that have no value comparisons yet (anti-join on the embedded resource)."""
+        return self._get_unprocessed_entries(user_id, "value_comparison_instances", limit)
+    
+    def _get_unprocessed_entries(self, user_id: str, table: str, limit: int = None) -> List[Dict]:
+        query = self.client.table("journal_entries")\
+            .select(f"*, {table}(id)")\
             .eq("user_id", user_id)\
-            .order("created_at.desc").execute()
-        
-        returned_entries = []
-        for entry in response.data:
-            if entry["date"] in not_in_timestamps:
-                break
-            if entry["id"] in not_in_ids:
-                break
-            returned_entries.append(entry)
-        return returned_entries
+            .is_(table, "null")\
+            .order("created_at", desc=True)
+        if limit is not None:
+            query = query.limit(limit)
+        entries = query.execute().data
+        for entry in entries:
+            entry.pop(table, None)
+        return entries
     
     def add_entry(self, what_happened: str, user_id: str, date: str) -> Dict:
         """Add a new journal entry."""
@@ -86,6 +156,19 @@ class SupabaseProvider(DatabaseProvider):
         response = self.client.table("activities").select("*").eq("user_id", user_id).execute()
         return response.data
     
+    def get_activities_and_entries(self, user_id: str) -> List[tuple]:
+        """Get activities with their entry date in a single embedded-resource select."""
+        response = self.client.table("activities")\
+            .select("id, user_id, activity, activity_raw, emotions, entry_id, data, journal_entries!inner(date)")\
+            .eq("user_id", user_id)\
+            .execute()
+        merged_data = []
+        for activity in response.data:
+            entry = activity.pop("journal_entries")
+            merged_data.append((activity, entry["date"]))
+        merged_data.sort(key=lambda x: x[1], reverse=True)
+        return merged_data
+    
     def add_activity(self, activity_data: Any, entry_id: str, user_id: str) -> Optional[Dict]:
         """Add a new activity."""
         activity_record = {
@@ -102,12 +185,47 @@ class SupabaseProvider(DatabaseProvider):
             return response.data[0]
         return None
     
+    def add_activities_bulk(self, activities_data: List[Any], entry_id: str, user_id: str) -> List[Dict]:
+        """Add several activities for one entry in a single insert request."""
+        activity_records = [
+            {
+                "user_id": user_id,
+                "activity": activity_data.activity,
+                "activity_raw": activity_data.activity_raw,
+                "emotions": activity_data.emotion.name,
+                "entry_id": entry_id,
+                "data": {"reviewed": False}
+            }
+            for activity_data in activities_data
+        ]
+        if not activity_records:
+            return []
+        
+        response = self.client.table("activities").insert(activity_records).execute()
+        return response.data
+    
     def edit_activity(self, activity_id: str, update_payload: Dict) -> Dict:
         """Edit an existing activity."""
         response = self.client.table("activities").update(update_payload).eq('id', activity_id).execute()
         print("Activity updated successfully.")
         return response.data[0] if response.data else {}
     
+    def apply_activity_changes(self, changes: List[Dict]) -> Dict:
+        """Apply activity updates and deletes atomically in a single request.
+
+        Calls the ``apply_activity_changes`` Postgres function (see
+        APPLY_ACTIVITY_CHANGES_SQL, created once per project), which sets only
+        the changed columns and deletes rows in one statement.
+        """
+        payload = [
+            {"id": c["id"], "update": c.get("update") or {}, "delete": bool(c.get("delete"))}
+            for c in changes
+        ]
+        result = self.client.rpc("apply_activity_changes", {"changes": payload}).execute().data or {}
+        updated, deleted_ids = result.get("updated") or [], result.get("deleted") or []
+        print(f"Activities updated: {len(updated)}, deleted: {len(deleted_ids)}.")
+        return {"updated": updated, "deleted": deleted_ids}
+    
     def delete_activity(self, activity_id: str) -> Dict:
         """Delete an activity."""
         response = self.client.table("activities").delete().eq('id', activity_id).execute()
@@ -167,6 +285,27 @@ class SupabaseProvider(DatabaseProvider):
             return response.data[0]
         return None
     
+    def add_value_comparison_instances_bulk(self, value_comps: List[tuple], new_entry: Dict) -> List[Dict]:
+        """Add (value_comp, superior_value_id, inferior_value_id) tuples for one entry in a single insert request."""
+        new_value_comparisons = [
+            {
+                "user_id": new_entry["user_id"],
+                "type": "entry",
+                "superior_value_id": superior_value_id,
+                "inferior_value_id": inferior_value_id,
+                "reason": value_comp.reason,
+                "entry_id": new_entry["id"],
+                "data": {"entry_extract": value_comp.ref},
+                "user_sentiment": 'undecided'
+            }
+            for value_comp, superior_value_id, inferior_value_id in value_comps
+        ]
+        if not new_value_comparisons:
+            return []
+        
+        response = self.client.table("value_comparison_instances").insert(new_value_comparisons).execute()
+        return response.data
+    
     def edit_value_comparison_instance(self, value_comparison_id: str, update_payload: Dict) -> Dict:
         """Edit a value comparison instance."""
         response = self.client.table("value_comparison_instances").update(update_payload).eq('id', value_comparison_id).execute()
@@ -174,31 +313,33 @@ class SupabaseProvider(DatabaseProvider):
         return response.data[0] if response.data else {}
     
     def get_value_comparison_from_entries(self, user_id: str) -> List[Dict]:
-        """Get value comparisons associated with journal entries."""
-        entries = self.client.table("journal_entries").select("id, date").eq("user_id", user_id).execute()
-        entries_dict = {entry['id']: entry["date"] for entry in entries.data}
-        value_comparison_instances = self.client.table("value_comparison_instances").select("*").eq('type', 'entry').execute()
+        """Get value comparisons associated with the user's journal entries."""
+        response = self.client.table("value_comparison_instances")\
+            .select("*, journal_entries!inner(date)")\
+            .eq("user_id", user_id)\
+            .eq("type", "entry")\
+            .execute()
         value_comparisons = []
-        for instance in value_comparison_instances.data:
-            entry_ids = list(entries_dict.keys())
-            if instance['entry_id'] in entry_ids:
-                instance['date'] = entries_dict[instance['entry_id']]
-                value_comparisons.append(instance)
+        for instance in response.data:
+            entry = instance.pop("journal_entries")
+            instance['date'] = entry["date"]
+            value_comparisons.append(instance)
         
         value_comparisons.sort(key=lambda x: x['date'], reverse=True)
         return value_comparisons
     
     def get_value_comparison_from_threads(self, user_id: str) -> List[Dict]:
-        """Get value comparisons associated with threads."""
-        threads = self.client.table("threads").select("id, created_at").eq("user_id", user_id).execute()
-        threads_dict = {thread['id']: thread["created_at"] for thread in threads.data}
-        value_comparison_instances = self.client.table("value_comparison_instances").select("*").eq('type', 'thread').execute()
+        """Get value comparisons associated with the user's threads."""
+        response = self.client.table("value_comparison_instances")\
+            .select("*, threads!inner(created_at)")\
+            .eq("user_id", user_id)\
+            .eq("type", "thread")\
+            .execute()
         value_comparisons = []
-        for instance in value_comparison_instances.data:
-            thread_ids = list(threads_dict.keys())
-            if instance['thread_id'] in thread_ids:
-                instance['created_at'] = threads_dict[instance['thread_id']]
-                value_comparisons.append(instance)
+        for instance in response.data:
+            thread = instance.pop("threads")
+            instance['created_at'] = thread["created_at"]
+            value_comparisons.append(instance)
         
         value_comparisons.sort(key=lambda x: x['created_at'], reverse=True)
         return value_comparisons
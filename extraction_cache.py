@@ -0,0 +1,152 @@
+"""
+Persistent cache for structured model extractions in Dwell
+Avoids repeat model calls for content that has already been analyzed
+"""
+
+import hashlib
+import os
+import time
+from typing import Optional
+
+from database.providers.sqlite_pool import SQLiteConnectionPool
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 of a piece of text, matching journal_entries.content_hash."""
+    return hashlib.sha256((text or "").encode()).hexdigest()
+
+
+class ExtractionCache:
+    """SQLite-backed cache of extraction results with LRU and TTL eviction.
+
+    Entries are keyed by (kind, content hash, prompt version, model, user bio
+    hash) so a change to any of them is a miss rather than a stale hit.
+    Values are the JSON serialization of the instructor response model.
+    """
+
+    def __init__(
+        self,
+        db_path: str = None,
+        max_entries: int = None,
+        ttl_seconds: float = None,
+    ):
+        self.db_path = db_path or os.getenv(
+            "EXTRACTION_CACHE_PATH", "dwell_cache.db"
+        )
+        self.max_entries = (
+            max_entries
+            if max_entries is not None
+            else int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "5000"))
+        )
+        self.ttl_seconds = (
+            ttl_seconds
+            if ttl_seconds is not None
+            else float(os.getenv("EXTRACTION_CACHE_TTL_DAYS", "90")) * 86400
+        )
+        self.pool = SQLiteConnectionPool.for_path(self.db_path)
+        self.initialize()
+
+    def initialize(self):
+        """Create the cache table if needed."""
+        with self.pool.connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS extraction_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    prompt_version TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    user_bio_hash TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )
+            """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_extraction_cache_last_accessed
+                ON extraction_cache (last_accessed)
+            """
+            )
+            conn.commit()
+
+    @staticmethod
+    def make_key(
+        kind: str, text: str, prompt_version: str, model: str, user_bio: str = ""
+    ) -> tuple:
+        """Build the key fields for a cache entry."""
+        fields = (
+            kind,
+            content_hash(text),
+            prompt_version,
+            model,
+            content_hash(user_bio),
+        )
+        return ("|".join(fields),) + fields
+
+    def get(self, key: tuple) -> Optional[str]:
+        """Return the cached result for ``key`` or None on a miss/expiry."""
+        now = time.time()
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT result, created_at FROM extraction_cache WHERE cache_key = ?",
+                (key[0],),
+            ).fetchone()
+            if row is None:
+                return None
+            result, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                conn.execute(
+                    "DELETE FROM extraction_cache WHERE cache_key = ?", (key[0],)
+                )
+                conn.commit()
+                return None
+            conn.execute(
+                "UPDATE extraction_cache SET last_accessed = ? WHERE cache_key = ?",
+                (now, key[0]),
+            )
+            conn.commit()
+            return result
+
+    def set(self, key: tuple, result: str):
+        """Store ``result`` under ``key`` and evict least recently used rows."""
+        now = time.time()
+        with self.pool.connection() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO extraction_cache
+                (cache_key, kind, content_hash, prompt_version, model, user_bio_hash,
+                 result, created_at, last_accessed)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                key + (result, now, now),
+            )
+            self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn, now: float):
+        """Drop expired rows, then the least recently used beyond max_entries."""
+        if self.ttl_seconds:
+            conn.execute(
+                "DELETE FROM extraction_cache WHERE created_at < ?",
+                (now - self.ttl_seconds,),
+            )
+        if self.max_entries:
+            conn.execute(
+                """
+                DELETE FROM extraction_cache WHERE cache_key IN (
+                    SELECT cache_key FROM extraction_cache
+                    ORDER BY last_accessed DESC
+                    LIMIT -1 OFFSET ?
+                )
+            """,
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        """Remove every cached extraction."""
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM extraction_cache")
+            conn.commit()
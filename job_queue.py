@@ -0,0 +1,258 @@
+"""
+Background analysis jobs for journal entries in Dwell
+Jobs are persisted in SQLite and processed by worker threads with retries
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from database.providers.sqlite_pool import SQLiteConnectionPool
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class JobQueue:
+    """SQLite-backed queue of entry analysis jobs with a pool of worker threads.
+
+    ``handler`` is called with the job row and should raise on failure; failed
+    jobs are retried with exponential backoff until ``max_attempts``. At most
+    one job per entry runs at a time; an entry edited while it is being
+    analyzed gets a follow-up job that waits for the running one. Jobs
+    survive restarts: anything left ``running`` by a previous process is
+    queued again on startup. Finished jobs are kept for ``retention_seconds``
+    so pages can show their status.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Dict], Any],
+        db_path: str = None,
+        workers: int = None,
+        max_attempts: int = None,
+        retry_base_seconds: float = None,
+        retry_max_seconds: float = 3600.0,
+        poll_interval: float = 5.0,
+        retention_seconds: float = 86400.0,
+    ):
+        self.handler = handler
+        self.db_path = db_path or os.getenv("JOB_QUEUE_PATH", "dwell_jobs.db")
+        self.pool = SQLiteConnectionPool.for_path(self.db_path)
+        self.workers = workers or int(os.getenv("JOB_QUEUE_WORKERS", "2"))
+        self.max_attempts = max_attempts or int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+        self.retry_base_seconds = (
+            retry_base_seconds
+            if retry_base_seconds is not None
+            else float(os.getenv("JOB_RETRY_BASE_SECONDS", "30"))
+        )
+        self.retry_max_seconds = retry_max_seconds
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self._threads = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self.initialize()
+
+    @contextmanager
+    def _transaction(self):
+        """Borrow a pooled connection for one write transaction, locked up front."""
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    def initialize(self):
+        """Create the jobs table and requeue jobs interrupted by a restart."""
+        with self.pool.connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS analysis_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    entry_id TEXT NOT NULL,
+                    content_hash TEXT,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    run_after REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """
+            )
+            columns = {
+                row["name"] for row in conn.execute("PRAGMA table_info(analysis_jobs)")
+            }
+            if "content_hash" not in columns:
+                conn.execute("ALTER TABLE analysis_jobs ADD COLUMN content_hash TEXT")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_analysis_jobs_status ON analysis_jobs (status, run_after)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_analysis_jobs_user ON analysis_jobs (user_id, status)"
+            )
+            conn.execute(
+                "UPDATE analysis_jobs SET status = ?, updated_at = ? WHERE status = ?",
+                (JOB_QUEUED, time.time(), JOB_RUNNING),
+            )
+            conn.commit()
+
+    def enqueue(self, user_id: str, entry_id: Any, content_hash: str = None) -> int:
+        """Queue analysis of an entry's content (identified by ``content_hash``).
+
+        An entry already waiting is not queued twice; its job is updated to
+        the latest content instead.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id FROM analysis_jobs WHERE entry_id = ? AND status = ?",
+                (str(entry_id), JOB_QUEUED),
+            ).fetchone()
+            if row is not None:
+                job_id = row["id"]
+                conn.execute(
+                    """
+                    UPDATE analysis_jobs
+                    SET content_hash = ?, run_after = ?, attempts = 0, updated_at = ?
+                    WHERE id = ?
+                """,
+                    (content_hash, now, now, job_id),
+                )
+            else:
+                job_id = conn.execute(
+                    """
+                    INSERT INTO analysis_jobs
+                    (user_id, entry_id, content_hash, status, run_after, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                    (str(user_id), str(entry_id), content_hash, JOB_QUEUED, now, now, now),
+                ).lastrowid
+        self._wakeup.set()
+        return job_id
+
+    def _claim(self) -> Optional[Dict]:
+        """Mark the next due job as running and return it, skipping entries already being analyzed."""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                """
+                SELECT * FROM analysis_jobs
+                WHERE status = ? AND run_after <= ?
+                AND entry_id NOT IN (SELECT entry_id FROM analysis_jobs WHERE status = ?)
+                ORDER BY run_after, id LIMIT 1
+            """,
+                (JOB_QUEUED, now, JOB_RUNNING),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE analysis_jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (JOB_RUNNING, now, row["id"]),
+                )
+        if row is None:
+            return None
+        job = dict(row)
+        job["attempts"] += 1
+        return job
+
+    def _finish(self, job: Dict, error: Optional[Exception] = None):
+        now = time.time()
+        if error is None:
+            status, run_after, last_error = JOB_DONE, job["run_after"], None
+        elif job["attempts"] >= self.max_attempts:
+            status, run_after, last_error = JOB_FAILED, job["run_after"], str(error)
+        else:
+            delay = min(
+                self.retry_max_seconds,
+                self.retry_base_seconds * 2 ** (job["attempts"] - 1),
+            )
+            status, run_after, last_error = JOB_QUEUED, now + delay, str(error)
+
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE analysis_jobs SET status = ?, run_after = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                (status, run_after, last_error, now, job["id"]),
+            )
+            conn.execute(
+                "DELETE FROM analysis_jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (JOB_DONE, JOB_FAILED, now - self.retention_seconds),
+            )
+
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                job = self._claim()
+            except (sqlite3.Error, TimeoutError) as e:
+                print(f"Could not claim analysis job: {e}")
+                job = None
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            try:
+                self.handler(job)
+                error = None
+            except Exception as e:
+                print(
+                    f"Analysis job {job['id']} for entry {job['entry_id']} failed "
+                    f"(attempt {job['attempts']} of {self.max_attempts}): {e}"
+                )
+                error = e
+            try:
+                self._finish(job, error)
+            except (sqlite3.Error, TimeoutError) as e:
+                print(f"Could not update analysis job {job['id']}: {e}")
+            # A follow-up job for the same entry may have been waiting on this one
+            self._wakeup.set()
+
+    def start(self):
+        """Start the worker threads (once per queue)."""
+        with self._lock:
+            if self._threads:
+                return
+            self._stopping.clear()
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._work, name=f"analysis-worker-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = None):
+        """Ask the workers to exit after their current job and wait for them."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in threads:
+            thread.join(timeout)
+
+    def get_jobs(self, user_id: str, statuses: List[str] = None) -> List[Dict]:
+        """Jobs of a user (optionally only with the given statuses), newest first."""
+        query = "SELECT * FROM analysis_jobs WHERE user_id = ?"
+        params = [str(user_id)]
+        if statuses:
+            query += f" AND status IN ({', '.join('?' for _ in statuses)})"
+            params.extend(statuses)
+        query += " ORDER BY id DESC"
+        with self.pool.connection() as conn:
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+
+    def pending_entry_ids(self, user_id: str) -> Set[str]:
+        """Ids (as strings) of the user's entries that are queued or being analyzed."""
+        return {
+            job["entry_id"]
+            for job in self.get_jobs(user_id, [JOB_QUEUED, JOB_RUNNING])
+        }
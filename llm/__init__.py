@@ -0,0 +1,3 @@
+from .base_provider import LLMProvider, Usage
+
+__all__ = ['LLMProvider', 'Usage']
@@ -0,0 +1,48 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class Usage(NamedTuple):
+    """Token usage of one model call, shaped like the OpenAI ``usage`` object."""
+
+    prompt_tokens: int
+    completion_tokens: int
+
+
+class LLMProvider(ABC):
+    """Abstract base class for the model backends behind AIService."""
+
+    @property
+    @abstractmethod
+    def provider_name(self) -> str:
+        """Return the name of this provider."""
+        pass
+
+    @abstractmethod
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.7,
+        use_helicone: bool = True,
+    ) -> Tuple[str, Optional[Any]]:
+        """Complete a chat; returns the reply and its usage (None if unknown)."""
+        pass
+
+    @abstractmethod
+    def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.7,
+        use_helicone: bool = True,
+    ) -> Iterator[str]:
+        """Complete a chat, yielding content deltas as they arrive."""
+        pass
+
+    @abstractmethod
+    def structured(
+        self, messages: List[Dict[str, str]], response_model: Any, model: str
+    ) -> Tuple[Any, Optional[Any]]:
+        """Complete into an instance of ``response_model``; returns it and its usage."""
+        pass
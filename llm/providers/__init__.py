@@ -0,0 +1,4 @@
+from .openai_provider import OpenAIProvider
+from .local_provider import LocalProvider
+
+__all__ = ['OpenAIProvider', 'LocalProvider']
@@ -0,0 +1,182 @@
+import hashlib
+import os
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from emotions import EmotionName
+from token_counter import count_message_tokens, count_tokens
+from values import ValueName
+
+from ..base_provider import LLMProvider, Usage
+
+EMOTION_NAMES = [emotion.value for emotion in EmotionName]
+VALUE_NAMES = [value.value for value in ValueName]
+
+# Longest names first so "burned out" wins over a shorter overlapping name
+_EMOTION_PATTERN = re.compile(
+    r"\b("
+    + "|".join(re.escape(name.lower()) for name in sorted(EMOTION_NAMES, key=len, reverse=True))
+    + r")\b"
+)
+_EMOTIONS_BY_LOWER = {name.lower(): name for name in EMOTION_NAMES}
+_VALUE_PATTERN = re.compile(
+    r"\b("
+    + "|".join(
+        re.escape(name.replace("_", " ").lower())
+        for name in sorted(VALUE_NAMES, key=len, reverse=True)
+    )
+    + r")\b"
+)
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def _stable_hash(text: str) -> int:
+    return int(hashlib.sha256(text.encode()).hexdigest()[:12], 16)
+
+
+class LocalProvider(LLMProvider):
+    """Deterministic offline backend for load tests, benchmarks and CI.
+
+    Responses are rule-based, depend only on the request and always validate
+    against the requested response model: activities are the sentences of the
+    content, emotions and values are the ones the text mentions (or picked
+    from a hash of the sentence), and chat replies reflect the last user
+    message. ``latency_seconds`` is slept before every call and
+    ``token_delay_seconds`` between streamed words, to simulate model latency.
+    """
+
+    def __init__(
+        self,
+        latency_seconds: float = None,
+        token_delay_seconds: float = None,
+        max_items: int = None,
+    ):
+        self.latency_seconds = (
+            latency_seconds
+            if latency_seconds is not None
+            else float(os.getenv("LOCAL_LLM_LATENCY_MS", "0")) / 1000
+        )
+        self.token_delay_seconds = (
+            token_delay_seconds
+            if token_delay_seconds is not None
+            else float(os.getenv("LOCAL_LLM_TOKEN_DELAY_MS", "0")) / 1000
+        )
+        self.max_items = max_items or int(os.getenv("LOCAL_LLM_MAX_ITEMS", "5"))
+
+    @property
+    def provider_name(self) -> str:
+        return "local"
+
+    def _wait(self):
+        if self.latency_seconds > 0:
+            time.sleep(self.latency_seconds)
+
+    @staticmethod
+    def _last_user_message(messages: List[Dict[str, str]]) -> str:
+        for message in reversed(messages):
+            if message["role"] == "user":
+                return message.get("content") or ""
+        return ""
+
+    def _sentences(self, text: str) -> List[str]:
+        sentences = [s.strip() for s in _SENTENCE_SPLIT.split(text) if s.strip()]
+        return sentences[: self.max_items] or ["unknown"]
+
+    def _reply(self, messages: List[Dict[str, str]]) -> str:
+        said = self._last_user_message(messages).strip()
+        if not said:
+            return "Tell me a little more about what is on your mind."
+        snippet = " ".join(said.split()[:12])
+        return (
+            f'You mentioned "{snippet}". '
+            "What feels most important to you about that, and what would you like to do next?"
+        )
+
+    @staticmethod
+    def _emotion_for(sentence: str) -> str:
+        match = _EMOTION_PATTERN.search(sentence.lower())
+        if match:
+            return _EMOTIONS_BY_LOWER[match.group(1)]
+        return EMOTION_NAMES[_stable_hash(sentence) % len(EMOTION_NAMES)]
+
+    def _act_emotions(self, sentences: List[str]) -> List[Dict]:
+        return [
+            {
+                "activity": " ".join(sentence.split()[:8]),
+                "emotion": {"name": self._emotion_for(sentence), "desc": ""},
+                "activity_raw": sentence,
+            }
+            for sentence in sentences
+        ]
+
+    def _value_comparison(self, superior: str, inferior: str, sentence: str) -> Dict:
+        return {
+            "superior": {"name": superior, "desc": ""},
+            "inferior": {"name": inferior, "desc": ""},
+            "date": "",
+            "ref": sentence,
+            "reason": f"{superior} is put ahead of {inferior} in: {sentence}",
+        }
+
+    def _values(self, sentences: List[str]) -> List[Dict]:
+        comparisons = []
+        for sentence in sentences:
+            mentioned = []
+            for match in _VALUE_PATTERN.finditer(sentence.lower()):
+                name = match.group(1).replace(" ", "_").upper()
+                if name not in mentioned:
+                    mentioned.append(name)
+            for superior, inferior in zip(mentioned, mentioned[1:]):
+                comparisons.append(self._value_comparison(superior, inferior, sentence))
+        if not comparisons:
+            # One comparison derived from the content so every entry yields data
+            h = _stable_hash(sentences[0])
+            i = h % len(VALUE_NAMES)
+            j = (i + 1 + (h // len(VALUE_NAMES)) % (len(VALUE_NAMES) - 1)) % len(VALUE_NAMES)
+            comparisons.append(
+                self._value_comparison(VALUE_NAMES[i], VALUE_NAMES[j], sentences[0])
+            )
+        return comparisons[: self.max_items]
+
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.7,
+        use_helicone: bool = True,
+    ) -> Tuple[str, Optional[Any]]:
+        self._wait()
+        reply = self._reply(messages)
+        return reply, Usage(
+            count_message_tokens(messages, model), count_tokens(reply, model)
+        )
+
+    def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.7,
+        use_helicone: bool = True,
+    ) -> Iterator[str]:
+        self._wait()
+        for i, word in enumerate(self._reply(messages).split(" ")):
+            if i and self.token_delay_seconds > 0:
+                time.sleep(self.token_delay_seconds)
+            yield word if i == 0 else " " + word
+
+    def structured(
+        self, messages: List[Dict[str, str]], response_model: Any, model: str
+    ) -> Tuple[Any, Optional[Any]]:
+        self._wait()
+        sentences = self._sentences(self._last_user_message(messages))
+        data = {}
+        if "act_emotions" in response_model.model_fields:
+            data["act_emotions"] = self._act_emotions(sentences)
+        if "values" in response_model.model_fields:
+            data["values"] = self._values(sentences)
+        result = response_model.model_validate(data)
+        return result, Usage(
+            count_message_tokens(messages, model),
+            count_tokens(result.model_dump_json(), model),
+        )
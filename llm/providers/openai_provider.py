@@ -0,0 +1,156 @@
+import importlib.util
+import os
+import threading
+from functools import cached_property
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+import instructor
+from dotenv import load_dotenv
+from openai import OpenAI
+
+from ..base_provider import LLMProvider
+
+load_dotenv()
+
+# Timeouts applied to every OpenAI request (seconds)
+OPENAI_TIMEOUT = httpx.Timeout(
+    float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60")),
+    connect=float(os.getenv("OPENAI_CONNECT_TIMEOUT_SECONDS", "10")),
+)
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Process-wide keep-alive connection pool shared by every OpenAI client.
+    Created on first use; HTTP/2 is used when the h2 package is installed.
+    """
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                http2 = (
+                    os.getenv("OPENAI_HTTP2", "true").lower() not in ("0", "false", "no")
+                    and importlib.util.find_spec("h2") is not None
+                )
+                _http_client = httpx.Client(
+                    http2=http2,
+                    timeout=OPENAI_TIMEOUT,
+                    limits=httpx.Limits(
+                        max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "20")),
+                        max_keepalive_connections=int(
+                            os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "10")
+                        ),
+                        keepalive_expiry=float(
+                            os.getenv("OPENAI_KEEPALIVE_EXPIRY_SECONDS", "30")
+                        ),
+                    ),
+                )
+    return _http_client
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI backend; the clients are created on first use."""
+
+    @property
+    def provider_name(self) -> str:
+        return "openai"
+
+    def _validate_api_key(self):
+        """Validate that OpenAI API key is properly set."""
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key or not api_key.startswith("sk-"):
+            raise ValueError("Please enter a valid OpenAI API key!")
+
+    @cached_property
+    def openai_client(self) -> OpenAI:
+        """Standard OpenAI client."""
+        return OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=get_http_client(),
+            timeout=OPENAI_TIMEOUT,
+        )
+
+    @cached_property
+    def helicone_client(self) -> OpenAI:
+        """OpenAI client with Helicone tracking."""
+        return OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url="https://oai.hconeai.com/v1",
+            default_headers={
+                "Helicone-Auth": os.getenv("HELICONE_AUTH"),
+            },
+            http_client=get_http_client(),
+            timeout=OPENAI_TIMEOUT,
+        )
+
+    @cached_property
+    def instructor_client(self) -> OpenAI:
+        """Instructor-patched client for structured outputs."""
+        return instructor.patch(
+            OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                # Commented out Helicone for instructor calls to avoid conflicts
+                # base_url="https://oai.hconeai.com/v1",
+                # default_headers={
+                #     "Helicone-Auth": os.getenv("HELICONE_AUTH"),
+                # }
+                http_client=get_http_client(),
+                timeout=OPENAI_TIMEOUT,
+                # Structured calls are retried by RetryPolicy instead
+                max_retries=0,
+            )
+        )
+
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.7,
+        use_helicone: bool = True,
+    ) -> Tuple[str, Optional[Any]]:
+        self._validate_api_key()
+        client = self.helicone_client if use_helicone else self.openai_client
+        completion = client.chat.completions.create(
+            temperature=temperature,
+            model=model,
+            messages=messages,
+        )
+        return completion.choices[0].message.content, completion.usage
+
+    def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.7,
+        use_helicone: bool = True,
+    ) -> Iterator[str]:
+        self._validate_api_key()
+        client = self.helicone_client if use_helicone else self.openai_client
+        stream = client.chat.completions.create(
+            temperature=temperature,
+            model=model,
+            messages=messages,
+            stream=True,
+        )
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+    def structured(
+        self, messages: List[Dict[str, str]], response_model: Any, model: str
+    ) -> Tuple[Any, Optional[Any]]:
+        self._validate_api_key()
+        result = self.instructor_client.chat.completions.create(
+            model=model,
+            response_model=response_model,
+            messages=messages,
+        )
+        raw_response = getattr(result, "_raw_response", None)
+        return result, getattr(raw_response, "usage", None)
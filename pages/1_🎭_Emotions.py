@@ -2,14 +2,15 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from database import DatabaseManager
+from reference_data import reference_data
 import enum
 import os
 from dotenv import load_dotenv
-import json
 from streamlit_extras.switch_page_button import switch_page
 from utils import (
     set_wide_page,
-    get_activities_emotions,
+    analyze_entries,
+    get_pending_analysis,
     is_user_valid,
     show_login,
     is_user_subscriber,
@@ -30,11 +31,6 @@ load_dotenv()
 db_manager = DatabaseManager()
 
 
-def emotions_metadata():
-    with open("emotions_with_desc.json") as f:
-        return json.load(f)
-
-
 def render_switch_page_component(i, activity, emotions):
     with st.form(key=f"ACTIVITIES_feel_better_form_{i}"):
         st.write(
@@ -57,7 +53,6 @@ def full_app():
     # Create elements to be used in the appcreated_at
     user_id = st.session_state["session_data"]["user"]["id"]
     activities_tuple_from_db = db_manager.get_activities_and_entries(user_id)
-    activity_timestamps = list(set([date for _, date in activities_tuple_from_db]))
     activities_from_db = {
         activity["id"]: activity for activity, _ in activities_tuple_from_db
     }
@@ -65,6 +60,7 @@ def full_app():
     activities_not_reviewed_from_db = {}
 
     activity_rows = []
+    activity_ids = []
     reviewed_entries = defaultdict(list)
 
     for i, (act_db, entry_timestamp) in enumerate(activities_tuple_from_db):
@@ -87,41 +83,46 @@ def full_app():
             activities_reviewed_from_db[act_db["id"]] = act_db
         else:
             activity_rows.append(activity_row)
+            activity_ids.append(act_db["id"])
             activities_not_reviewed_from_db[act_db["id"]] = act_db
 
+    # Edited rows are positions in the table as it was rendered; background
+    # analysis can insert activities between reruns, so keep rendering the same
+    # rows (and their ids) until the pending edits are saved or dropped
+    edited = st.session_state.get("ACTIVITIES_table")
+    if edited is None or not edited["edited_rows"] or "ACTIVITIES_rows" not in st.session_state:
+        st.session_state["ACTIVITIES_rows"] = (activity_rows, activity_ids)
+    activity_rows, activity_ids = st.session_state["ACTIVITIES_rows"]
+
     st.markdown("## Activities & Emotions")
-    print(f"activity_timestamps: {activity_timestamps}")
     user_id = st.session_state["session_data"]["user"]["id"]
-    new_entries = db_manager.get_entries(user_id, not_in_timestamps=activity_timestamps)
+    new_entries = db_manager.get_entries_without_activities(user_id)
+    pending_ids = get_pending_analysis(user_id)
+    pending_entries = [e for e in new_entries if str(e["id"]) in pending_ids]
+    new_entries = [e for e in new_entries if str(e["id"]) not in pending_ids]
+    if len(pending_entries) > 0:
+        st.info(
+            f"Analyzing the entries on {[e['date'] for e in pending_entries]} in the background."
+        )
+        if st.button("Refresh", key="EMOTIONS_refresh_analysis"):
+            st.rerun()
     if len(new_entries) > 0:
         st.write(
             f"Found {len(new_entries)} new entries on {[e['date'] for e in new_entries]} that was not included in calculating emotions."
         )
         if st.button(label="Analyze emotions (takes 1 minute)"):
-            for new_entry in new_entries:
-                emos = get_activities_emotions(new_entry["what_happened"])
-                for emo in emos:
-                    activity_row = {
-                        "Reviewed": False,
-                        "Delete": False,
-                        "Dive": False,
-                        "Activity": emo.activity,
-                        "Emotions": emo.emotion,
-                        "Activity Raw": emo.activity_raw,
-                        "Date": new_entry["date"],
-                    }
-                    activity_rows.append(activity_row)
-                    activity = db_manager.add_activity(
-                        emo, new_entry["id"], new_entry["user_id"]
-                    )
-                    id = activity["id"]
-                    if id:
-                        activities_from_db[id] = activity
-                        activities_not_reviewed_from_db[id] = activity
+            failed_entries = analyze_entries(new_entries)
+            failed_dates = [entry["date"] for entry in failed_entries]
 
-            st.rerun()
+            # keep the warning on screen; the analyzed entries show up on the next rerun
+            if failed_dates:
+                st.warning(
+                    f"Could not analyze the entries on {failed_dates}, please try again."
+                )
+            else:
+                st.rerun()
         print("New activity added successfully.")
-    else:
+    elif len(pending_entries) == 0:
         st.write("No new activities to review. Head to create a New Entry!")
         yesno = st.button("Create a New Entry!")
         if yesno:
@@ -190,10 +191,11 @@ def full_app():
             for row in edited["edited_rows"].values()
         ):
             if st.button(label="Save changes"):
-                activities_from_db_array = list(
-                    activities_not_reviewed_from_db.values()
-                )
+                changes = []
                 for i, row in edited["edited_rows"].items():
+                    activity = activities_from_db.get(activity_ids[i])
+                    if activity is None:
+                        continue  # removed since the table was rendered
                     update_payload = {}
                     if "Emotions" in row:
                         update_payload["emotions"] = row["Emotions"].lower()
@@ -202,17 +204,19 @@ def full_app():
                         update_payload["activity"] = row["Activity"]
 
                     if "Reviewed" in row and row["Reviewed"]:
-                        data = activities_from_db_array[i]["data"]
+                        data = activity["data"]
                         data.update({"reviewed": True})
                         update_payload["data"] = data
 
-                    if update_payload:
-                        response = db_manager.edit_activity(
-                            activities_from_db_array[i]["id"], update_payload
-                        )
+                    changes.append(
+                        {
+                            "id": activity["id"],
+                            "update": update_payload,
+                            "delete": "Delete" in row and row["Delete"],
+                        }
+                    )
 
-                    if "Delete" in row and row["Delete"]:
-                        db_manager.delete_activity(activities_from_db_array[i]["id"])
+                db_manager.apply_activity_changes(changes)
 
                 st.session_state["ACTIVITIES_table"]["edited_rows"].clear()
                 st.write("Changes saved!")
@@ -267,14 +271,13 @@ def full_app():
 
 def _reformat_data(reviewed_entries):
     df_able_count = collections.defaultdict(int)
-    meta = emotions_metadata()
-    emotion_meta = {k.lower(): v for k, v in meta.items()}
+    emotion_coordinates = reference_data.emotion_coordinates()
     num_dates = 0
     for reviewed_entry_date, activities in reviewed_entries.items():
         num_dates += 1
         for activity in activities:
             emotion_name = activity["Emotions"].lower()
-            if emotion_name not in emotion_meta:
+            if emotion_name not in emotion_coordinates:
                 print(f"{emotion_name} not counted")
                 break
 
@@ -285,11 +288,12 @@ def _reformat_data(reviewed_entries):
     for (date, emotion), pop in df_able_count.items():
         adate = datetime.strptime(date, "%Y-%m-%d").date()
         date_set.add(adate)
+        x, y = emotion_coordinates[emotion]
         df_able.append(
             {
                 "date": date,
-                "x": emotion_meta[emotion]["x"],
-                "y": emotion_meta[emotion]["y"],
+                "x": x,
+                "y": y,
                 "emotion": emotion,
                 "pop": pop,
             }
@@ -4,7 +4,8 @@ from dotenv import load_dotenv
 from database import DatabaseManager
 from utils import (
     set_wide_page,
-    get_value_comparisons,
+    analyze_entries,
+    get_pending_analysis,
     is_user_valid,
     show_login,
     is_user_subscriber,
@@ -12,11 +13,14 @@ from utils import (
 
 set_wide_page(st)
 from streamlit_extras.switch_page_button import switch_page
-from value_examinor import ValueExaminor
+from value_examinor import ValueGraph
+from value_ranking import ValueRanker
 import os
 import streamlit_analytics
 from datetime import datetime
 import collections
+import threading
+import time
 
 load_dotenv()
 
@@ -44,15 +48,8 @@ def verdict_conversion(verdict, reverse=False):
 
 
 def get_incompleted_entries(user_id):
-    # Get all entry ids from ValueComparisons
-    value_comparisons = db_manager.get_value_comparison_instances(user_id)
-    value_comparison_entry_ids = [
-        v["entry_id"] for v in value_comparisons if v["entry_id"] is not None
-    ]
     # Get all entries that are not in ValueComparisons
-    user_id = st.session_state["session_data"]["user"]["id"]
-    entries = db_manager.get_entries(user_id, not_in_ids=value_comparison_entry_ids)
-    return entries
+    return db_manager.get_entries_without_value_comparisons(user_id)
 
 
 def fetch_values_fromDB():
@@ -102,6 +99,72 @@ def fetch_value_comparisons(values_id_DB):
     )
 
 
+@st.cache_resource
+def _value_profiles():
+    """Value graph and ranking per user, shared by every session in this process."""
+    return {}, threading.RLock()
+
+
+def add_to_value_profile(
+    value_graph, value_ranker, comparison_id, value_comp, values_id_DB
+):
+    superior = clean_text_for_display(
+        values_id_DB[value_comp["superior_value_id"]]["name"]
+    )
+    inferior = clean_text_for_display(
+        values_id_DB[value_comp["inferior_value_id"]]["name"]
+    )
+    with _value_profiles()[1]:
+        value_graph.add_comparison(
+            superior,
+            inferior,
+            value_comp["reason"],
+            value_comp["date"],
+            comparison_id=comparison_id,
+        )
+        value_ranker.add_comparison(
+            superior, inferior, value_comp["date"], comparison_id=comparison_id
+        )
+
+
+def get_value_profile(user_id, decided_dict, values_id_DB, generation):
+    # Kept per user until the data cache generation (read before decided_dict
+    # was loaded) changes or its TTL passes; then only newly confirmed
+    # comparisons are added, and the profile is rebuilt if one went away
+    profiles, lock = _value_profiles()
+    with lock:
+        profile = profiles.get(user_id)
+        if (
+            profile is not None
+            and profile["generation"] == generation
+            and time.monotonic() - profile["checked_at"] < db_manager.cache.ttl_seconds
+        ):
+            return profile["graph"], profile["ranker"]
+
+        confirmed = {
+            comparison_id: value_comp
+            for comparison_id, value_comp in decided_dict.items()
+            if value_comp["user_sentiment"] == "confirmed"
+        }
+        if profile is None or not profile["graph"].comparison_ids <= confirmed.keys():
+            profile = {"graph": ValueGraph(), "ranker": ValueRanker()}
+            profiles[user_id] = profile
+
+        known_ids = profile["graph"].comparison_ids
+        for comparison_id, value_comp in confirmed.items():
+            if comparison_id not in known_ids:
+                add_to_value_profile(
+                    profile["graph"],
+                    profile["ranker"],
+                    comparison_id,
+                    value_comp,
+                    values_id_DB,
+                )
+        profile["generation"] = generation
+        profile["checked_at"] = time.monotonic()
+        return profile["graph"], profile["ranker"]
+
+
 def conflict_handler(nodes, comparisons):
     st.markdown(
         f'<p style="color:red;">*Conflict detected: { " > ".join(nodes)}</p>',
@@ -124,6 +187,7 @@ def conflict_handler(nodes, comparisons):
 
 def app():
     values_name_DB, values_id_DB = fetch_values_fromDB()
+    data_generation = db_manager.cache.generation
     (
         decided_rows,
         undecided_rows,
@@ -135,42 +199,28 @@ def app():
     st.markdown("## Calculate Demonstrated Values")
     user_id = st.session_state["session_data"]["user"]["id"]
     new_entries = get_incompleted_entries(user_id)
+    pending_ids = get_pending_analysis(user_id)
+    pending_entries = [e for e in new_entries if str(e["id"]) in pending_ids]
+    new_entries = [e for e in new_entries if str(e["id"]) not in pending_ids]
+    if len(pending_entries) > 0:
+        st.info(
+            f"Analyzing the entries on {[e['date'] for e in pending_entries]} in the background."
+        )
+        if st.button("Refresh", key="VALUES_refresh_analysis"):
+            st.rerun()
     if len(new_entries) > 0:
         st.write(
             f"Found {len(new_entries)} new entries on {[e['date'] for e in new_entries]} that was not included in calculating values."
         )
         if st.button(label="Analyze values (takes 1 minute)"):
-            for new_entry in new_entries:
-                # prompt_suffix = st.text_area("Work on your values", "Based on the journal entries, make list of value comparisons such as superior A > inferior B (A not equal to B), updated where necessary by specific evidence in activities happened in the journal. Use each value's desc to see what they mean. Only include if there is sufficient evidence. ", key=f'custom_values_analysis_prompt')
-                value_comparisons = []
-                result = get_value_comparisons(new_entry["what_happened"])
-                for value_comp in result:
-                    value_comparisons.append(
-                        {
-                            "verdict": "🤷‍♀️ Undecided",
-                            "superior": clean_text_for_display(
-                                value_comp.superior.name.value
-                            ),
-                            "inferior": clean_text_for_display(
-                                value_comp.inferior.name.value
-                            ),
-                            "reason": value_comp.reason,
-                            "ref": value_comp.ref,
-                            "date": str(new_entry["date"]),
-                        }
-                    )
-                    new_value_comparison = db_manager.add_value_comparison_instance(
-                        value_comp,
-                        new_entry,
-                        values_name_DB[value_comp.superior.name.value]["id"],
-                        values_name_DB[value_comp.inferior.name.value]["id"],
-                    )
-                    undecided_dict.update(
-                        {new_value_comparison["id"]: new_value_comparison}
-                    )
-
-                undecided_rows += value_comparisons
-    else:
+            failed_entries = analyze_entries(new_entries)
+            if failed_entries:
+                st.warning(
+                    f"Could not analyze the entries on {[e['date'] for e in failed_entries]}, please try again."
+                )
+            else:
+                st.rerun()
+    elif len(pending_entries) == 0:
         st.write("No new values to review. Head to create a New Entry!")
         yesno = st.button("Create a New Entry!")
         if yesno:
@@ -178,26 +228,50 @@ def app():
 
     st.markdown("## Demostrated Values")
 
-    value_examinor = ValueExaminor()
-    orders = value_examinor.derive_orders(
-        [
-            (
-                decided_row["superior"],
-                decided_row["inferior"],
-                decided_row["reason"],
-                decided_row["date"],
-            )
-            for decided_row in decided_rows
-            if decided_row["verdict"] == "🫡 agree"
-        ],
-        conflict_handler,
+    value_graph, value_ranker = get_value_profile(
+        user_id, decided_dict, values_id_DB, data_generation
+    )
+    # Other sessions of the same user may update the shared profile meanwhile
+    with _value_profiles()[1]:
+        cycles = value_graph.conflicts()
+        comparisons = {
+            pair: list(value_graph.comparisons.get(pair, ()))
+            for cycle in cycles
+            for pair in zip(cycle, cycle[1:])
+        }
+        reduction = value_graph.transitive_reduction()
+        ranking = value_ranker.top_k(10)
+    for cycle in cycles:
+        conflict_handler(cycle, comparisons)
+    graphviz_text = "\n".join(
+        " -> ".join("_".join(t.split(" ")) for t in edge) for edge in reduction
     )
-    graphviz_texts = []
-    for order in orders:
-        graphviz_texts.append(" -> ".join(["_".join(t.split(" ")) for t in order]))
-    graphviz_text = "\n".join(graphviz_texts)
     st.graphviz_chart("digraph {" + graphviz_text + "}")
 
+    if ranking:
+        st.markdown("## Top Values")
+        st.dataframe(
+            pd.DataFrame(
+                [
+                    {
+                        "rank": rank,
+                        "value": clean_text_for_display(name),
+                        "strength": round(strength, 2),
+                    }
+                    for rank, (name, strength) in enumerate(ranking, start=1)
+                ]
+            ),
+            hide_index=True,
+        )
+
+    # Edited rows are positions in the table as it was rendered; background
+    # analysis can insert comparisons between reruns, so keep rendering the
+    # same rows (and their ids) until the pending verdicts are saved or dropped
+    edited = st.session_state.get("VALUES_table")
+    if edited is None or not edited["edited_rows"] or "VALUES_rows" not in st.session_state:
+        st.session_state["VALUES_rows"] = (undecided_rows, list(undecided_dict.keys()))
+    undecided_rows, undecided_ids = st.session_state["VALUES_rows"]
+
     # RENDERING
     st.markdown("## Daily Review")
     if len(undecided_rows) > 0:
@@ -258,13 +332,24 @@ def app():
                 for row in edited["edited_rows"].values()
             ):
                 if st.button(label="Save changes"):
-                    undecided_dict_keys = list(undecided_dict.keys())
-                    undecided_dict_values = list(undecided_dict.values())
                     for i, row in edited["edited_rows"].items():
+                        comparison_id = undecided_ids[i]
+                        if comparison_id not in undecided_dict:
+                            continue  # removed or decided since the table was rendered
+                        user_sentiment = verdict_conversion(row["verdict"])
                         db_manager.edit_value_comparison_instance(
-                            undecided_dict_keys[i],
-                            {"user_sentiment": verdict_conversion(row["verdict"])},
+                            comparison_id,
+                            {"user_sentiment": user_sentiment},
                         )
+                        if user_sentiment == "confirmed":
+                            add_to_value_profile(
+                                value_graph,
+                                value_ranker,
+                                comparison_id,
+                                undecided_dict[comparison_id],
+                                values_id_DB,
+                            )
+                    st.session_state["VALUES_table"]["edited_rows"].clear()
                     st.write("Changes saved!")
                     st.rerun()
 
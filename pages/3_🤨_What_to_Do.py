@@ -40,7 +40,7 @@ def chat(thread_id, user_id, values=None):
     system_prompt = f"""You are a trusted therapist in the user's life. Your goal is help user figure out what to do given a particular situation. The user's situation is {rant}. {value_statement} Message histories: """
     
     if len(st.session_state["WHATTODO_messages"]) == 0:
-        response = ai_service.chat_thread(
+        response = ai_service.chat_thread_stream(
             messages=[{"role": "system", "content": system_prompt}]
             + st.session_state.WHATTODO_messages
         )
@@ -59,7 +59,7 @@ def chat(thread_id, user_id, values=None):
         # Display user message in chat message container
         add_chat_message(st, user_id=user_id, thread_id=thread_id, role="user", message=prompt, history=st.session_state.WHATTODO_messages)
         
-        gpt_response = ai_service.chat_thread(
+        gpt_response = ai_service.chat_thread_stream(
             messages=[{"role": "system", "content": system_prompt}]
             + st.session_state.WHATTODO_messages
         )
@@ -75,7 +75,7 @@ def full_app():
     st.title("What to do", "what_to_do")
 
     user_id = st.session_state["session_data"]["user"]["id"]
-    values = db_manager.get_pairwise_user_values(user_id)
+    values = db_manager.get_user_values_summary(user_id)
     
     # Get user profile from auth manager
     from auth import AuthManager
@@ -43,7 +43,7 @@ def chat(thread_id, user_id):
     system_prompt = f"""You are a trusted therapist in the user's life. The user is feeling: {emotions} during the event: {activity}. User's goal is: {goal}. Help user achieve the goal by crafting a message. Message histories: """
     
     if len(st.session_state["HOWTOFEEL_messages"]) == 0:
-        response = ai_service.chat_thread(
+        response = ai_service.chat_thread_stream(
             messages=[{"role": "system", "content": system_prompt}]
             + st.session_state.HOWTOFEEL_messages
         )
@@ -62,7 +62,7 @@ def chat(thread_id, user_id):
         # Display user message in chat message container
         add_chat_message(st, user_id=user_id, thread_id=thread_id, role="user", message=prompt, history=st.session_state.HOWTOFEEL_messages)
         
-        gpt_response = ai_service.chat_thread(
+        gpt_response = ai_service.chat_thread_stream(
             messages=[{"role": "system", "content": system_prompt}]
             + st.session_state.HOWTOFEEL_messages
         )
@@ -78,7 +78,7 @@ def full_app():
     st.title("How to Feel", "how_to_feel")
 
     user_id = st.session_state["session_data"]["user"]["id"]
-    values = db_manager.get_pairwise_user_values(user_id)
+    values = db_manager.get_user_values_summary(user_id)
     
     # Get user profile from auth manager
     from auth import AuthManager
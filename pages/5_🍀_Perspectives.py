@@ -31,7 +31,7 @@ def how_this_works(expanded=False):
 
 
 def chat(user_id, thread_id):
-    values = db_manager.get_pairwise_user_values(user_id)
+    values = db_manager.get_user_values_summary(user_id)
     
     # Get user profile from auth manager
     from auth import AuthManager
@@ -112,7 +112,7 @@ def chat(user_id, thread_id):
             st.markdown(message["content"])
     
     if st.session_state["PERSPECTIVES_messages"][-1]["role"] == "user":
-        response = ai_service.chat_thread(
+        response = ai_service.chat_thread_stream(
             messages=[{"role": "system", "content": system_prompt}]
             + st.session_state.PERSPECTIVES_messages
         )
@@ -123,7 +123,7 @@ def chat(user_id, thread_id):
         "Write a message."
     ):
         add_chat_message(st, user_id=user_id, thread_id=thread_id, role="user", message=prompt, history=st.session_state.PERSPECTIVES_messages)
-        gpt_response = ai_service.chat_thread(
+        gpt_response = ai_service.chat_thread_stream(
             messages=[{"role": "system", "content": system_prompt}]
             + st.session_state.PERSPECTIVES_messages
         )
@@ -132,7 +132,7 @@ def chat(user_id, thread_id):
     # Add a button to add another entry
     if len(st.session_state.PERSPECTIVES_messages) >= 5:
         if st.button("Lucky Perspectives"):
-            gpt_response = ai_service.chat_thread(
+            gpt_response = ai_service.chat_thread_stream(
                 messages=[{"role": "system", "content": system_prompt}]
                 + st.session_state.PERSPECTIVES_messages
                 + [
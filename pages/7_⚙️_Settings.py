@@ -6,6 +6,8 @@ from dotenv import load_dotenv
 from auth import AuthManager
 import streamlit_analytics
 from database import DatabaseManager
+from ai_service import ai_service
+import pandas as pd
 from datetime import datetime
 
 load_dotenv()
@@ -38,6 +40,29 @@ if is_valid:
     #         progress = encrypt_journal(user_id)
     #         my_bar.progress(progress, text=progress_text)
 
+    with st.expander("Model usage (since the server started)"):
+        metrics = ai_service.get_metrics()
+        user_id = session_data["user"]["id"]
+        st.write(metrics["by_user"].get(str(user_id)) or "No model usage yet.")
+        # Process-wide usage covers every user, so it is only shown to admins
+        admin_emails = {
+            e.strip().lower()
+            for e in os.getenv("USAGE_METRICS_ADMIN_EMAILS", "").split(",")
+            if e.strip()
+        }
+        if email and email.lower() in admin_emails:
+            st.markdown("All users")
+            st.write(metrics["total"])
+            if metrics["by_call_site"]:
+                st.markdown("By call site")
+                st.dataframe(pd.DataFrame.from_dict(metrics["by_call_site"], orient="index"))
+            if metrics["by_user"]:
+                st.markdown("By user")
+                st.dataframe(pd.DataFrame.from_dict(metrics["by_user"], orient="index"))
+            if st.button("Reset usage metrics"):
+                ai_service.reset_metrics()
+                st.rerun()
+
     new_session_data = auth_manager.show_logout(st)
     if new_session_data is not None and "loggedOut" in new_session_data and new_session_data["loggedOut"]:
         st.session_state["session_data"] = None
@@ -0,0 +1,52 @@
+"""
+Prompt renderings of the emotion and value catalogs in Dwell
+Built once at import so every extraction prompt starts with the same text
+"""
+
+import os
+from collections import defaultdict
+
+from dotenv import load_dotenv
+
+from emotions import emotion_descriptions
+from reference_data import reference_data
+from values import ValueName, value_descriptions
+
+load_dotenv()
+
+# "compact" lists names only (emotions grouped by quadrant); "verbose" inlines
+# every description as the original prompts did, for comparing extraction quality
+PROMPT_CATALOG_STYLE = os.getenv("PROMPT_CATALOG_STYLE", "compact").lower()
+
+EMOTION_QUADRANT_LABELS = {
+    "high_eng_pleasant": "High energy, pleasant",
+    "low_eng_pleasant": "Low energy, pleasant",
+    "high_eng_unpleasant": "High energy, unpleasant",
+    "low_eng_unpleasant": "Low energy, unpleasant",
+}
+
+
+def render_emotion_catalog(style: str = PROMPT_CATALOG_STYLE) -> str:
+    """Emotion names allowed in extractions, rendered for a system prompt."""
+    if style == "verbose":
+        return f"Emotions: {emotion_descriptions}"
+
+    quadrants = defaultdict(list)
+    for name, meta in reference_data.emotions_metadata().items():
+        quadrants[meta["type"]].append(name)
+    lines = [
+        f"{EMOTION_QUADRANT_LABELS.get(quadrant, quadrant)}: {', '.join(names)}"
+        for quadrant, names in quadrants.items()
+    ]
+    return "Emotions, grouped by energy and pleasantness:\n" + "\n".join(lines)
+
+
+def render_value_catalog(style: str = PROMPT_CATALOG_STYLE) -> str:
+    """Value names allowed in extractions, rendered for a system prompt."""
+    if style == "verbose":
+        return f"Values: {value_descriptions}"
+    return "Values: " + ", ".join(value.value for value in ValueName)
+
+
+EMOTION_CATALOG = render_emotion_catalog()
+VALUE_CATALOG = render_value_catalog()
@@ -0,0 +1,101 @@
+"""
+Process-wide registry of static reference data in Dwell
+Human values and emotion metadata are loaded once and shared by all pages
+"""
+
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+
+EMOTIONS_METADATA_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "emotions_with_desc.json"
+)
+
+
+class ReferenceData:
+    """Loads effectively immutable catalogs once per process.
+
+    Human values are loaded per database (their ids differ between providers)
+    through the loader passed in by the caller; emotion metadata comes from
+    emotions_with_desc.json. Lookup maps are precomputed at load time and
+    shared, so treat returned objects as read-only. Call ``refresh`` to reload.
+    """
+
+    def __init__(self, emotions_path: str = EMOTIONS_METADATA_PATH):
+        self.emotions_path = emotions_path
+        self._lock = threading.Lock()
+        self._human_values = {}
+        self._emotions = None
+
+    # Human values
+    def _values_catalog(
+        self, namespace: str, loader: Callable[[], List[Dict]]
+    ) -> Dict[str, Any]:
+        catalog = self._human_values.get(namespace)
+        if catalog is not None:
+            return catalog
+
+        values = loader()
+        catalog = {
+            "values": values,
+            "name_to_id": {value["name"]: value["id"] for value in values},
+            "id_to_name": {value["id"]: value["name"] for value in values},
+        }
+        with self._lock:
+            return self._human_values.setdefault(namespace, catalog)
+
+    def human_values(
+        self, namespace: str, loader: Callable[[], List[Dict]]
+    ) -> List[Dict]:
+        """All human value rows for the database identified by ``namespace``."""
+        return self._values_catalog(namespace, loader)["values"]
+
+    def value_name_to_id(
+        self, namespace: str, loader: Callable[[], List[Dict]]
+    ) -> Dict[str, Any]:
+        """Map of value name (e.g. "TRUE_FRIENDSHIP") to its database id."""
+        return self._values_catalog(namespace, loader)["name_to_id"]
+
+    def value_id_to_name(
+        self, namespace: str, loader: Callable[[], List[Dict]]
+    ) -> Dict[Any, str]:
+        """Map of value database id to its name."""
+        return self._values_catalog(namespace, loader)["id_to_name"]
+
+    # Emotions
+    def _emotions_catalog(self) -> Dict[str, Any]:
+        catalog = self._emotions
+        if catalog is not None:
+            return catalog
+
+        with open(self.emotions_path) as f:
+            metadata = json.load(f)
+        catalog = {
+            "metadata": metadata,
+            "coordinates": {
+                name.lower(): (meta["x"], meta["y"]) for name, meta in metadata.items()
+            },
+        }
+        with self._lock:
+            if self._emotions is None:
+                self._emotions = catalog
+            return self._emotions
+
+    def emotions_metadata(self) -> Dict[str, Dict]:
+        """Emotion name to metadata (x, y, name, type, description)."""
+        return self._emotions_catalog()["metadata"]
+
+    def emotion_coordinates(self) -> Dict[str, Tuple[float, float]]:
+        """Lower-cased emotion name to its (valence, arousal) coordinates."""
+        return self._emotions_catalog()["coordinates"]
+
+    def refresh(self):
+        """Forget every loaded catalog so the next access reloads it."""
+        with self._lock:
+            self._human_values = {}
+            self._emotions = None
+
+
+# Global reference data registry
+reference_data = ReferenceData()
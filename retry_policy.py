@@ -0,0 +1,185 @@
+"""
+Retry and client-side rate limiting for model calls in Dwell
+Backs off exponentially with jitter and slows every thread down after a 429
+"""
+
+import functools
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional
+
+import openai
+from dotenv import load_dotenv
+from pydantic import ValidationError
+
+load_dotenv()
+
+# Error kinds worth another attempt; everything else is raised immediately
+RETRYABLE_ERRORS = {"rate_limit", "timeout", "connection", "server", "validation", "unknown"}
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting requests per second across threads.
+
+    A rate of 0 disables limiting, but ``pause`` still holds every caller
+    back, which is how a 429 from one thread slows down the others.
+    """
+
+    def __init__(self, rate_per_second: float, capacity: float = 1.0):
+        self.rate_per_second = rate_per_second
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until ``tokens`` are available, then take them."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._resume_at - now
+                if wait <= 0:
+                    if self.rate_per_second <= 0:
+                        return
+                    self._tokens = min(
+                        self.capacity,
+                        self._tokens + (now - self._updated) * self.rate_per_second,
+                    )
+                    self._updated = now
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return
+                    wait = (tokens - self._tokens) / self.rate_per_second
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hold back every ``acquire`` for the next ``seconds``."""
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+
+def _rate_limiter_from_env() -> TokenBucket:
+    requests_per_minute = float(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "0"))
+    return TokenBucket(
+        requests_per_minute / 60,
+        capacity=float(os.getenv("OPENAI_REQUEST_BURST", "5")),
+    )
+
+
+# Shared by every model call in the process
+rate_limiter = _rate_limiter_from_env()
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Delay requested by the server through Retry-After(-ms) headers, if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Retries model calls on transient errors with exponential backoff.
+
+    Delays use full jitter, uniform(0, min(max_delay, base_delay * 2^(n-1))),
+    unless the server sent Retry-After, which is honored (up to max_delay).
+    Rate limit errors also pause the shared ``rate_limiter`` so concurrent
+    batch extraction slows down instead of failing.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = None,
+        max_delay: float = None,
+        limiter: TokenBucket = None,
+        sleep: Callable[[float], Any] = time.sleep,
+    ):
+        self.max_retries = max(max_retries, 1)
+        self.base_delay = (
+            base_delay
+            if base_delay is not None
+            else float(os.getenv("RETRY_BASE_DELAY_SECONDS", "1"))
+        )
+        self.max_delay = (
+            max_delay
+            if max_delay is not None
+            else float(os.getenv("RETRY_MAX_DELAY_SECONDS", "30"))
+        )
+        self.limiter = limiter or rate_limiter
+        self.sleep = sleep
+
+    @staticmethod
+    def classify(error: Exception) -> str:
+        """Kind of failure: rate_limit, timeout, connection, server, validation, client, invalid or unknown."""
+        if isinstance(error, openai.RateLimitError):
+            return "rate_limit"
+        if isinstance(error, openai.APITimeoutError):
+            return "timeout"
+        if isinstance(error, openai.APIConnectionError):
+            return "connection"
+        if isinstance(error, openai.APIStatusError):
+            return "server" if error.status_code >= 500 else "client"
+        if isinstance(error, (ValidationError, openai.APIResponseValidationError)):
+            return "validation"
+        if isinstance(error, ValueError):
+            return "invalid"
+        return "unknown"
+
+    def delay(self, attempt: int, error: Exception) -> float:
+        """Seconds to wait before attempt ``attempt + 1``."""
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """Call ``func`` and retry it according to this policy."""
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                kind = self.classify(e)
+                if attempt == self.max_retries or kind not in RETRYABLE_ERRORS:
+                    print(f"AI call attempt {attempt} of {self.max_retries} failed ({kind}): {e}")
+                    raise
+                delay = self.delay(attempt, e)
+                print(
+                    f"AI call attempt {attempt} of {self.max_retries} failed ({kind}): {e}; "
+                    f"retrying in {delay:.1f}s"
+                )
+                if kind == "rate_limit":
+                    self.limiter.pause(delay)
+                self.sleep(delay)
+
+    def wrap(self, func: Callable) -> Callable:
+        """Decorator form of ``call``."""
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.call(func, *args, **kwargs)
+
+        return wrapper
@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+# Modules under test live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the SQLite files created at import time out of the working tree
+_tmp_dir = tempfile.mkdtemp(prefix="dwell-tests-")
+os.environ.setdefault("EXTRACTION_CACHE_PATH", os.path.join(_tmp_dir, "dwell_cache.db"))
+os.environ.setdefault("JOB_QUEUE_PATH", os.path.join(_tmp_dir, "dwell_jobs.db"))
+os.environ.setdefault("BACKGROUND_ANALYSIS", "false")
+os.environ.setdefault("AI_BACKEND", "local")
@@ -0,0 +1,32 @@
+from ai_service import ConversationContext
+
+
+def _thread(turns):
+    messages = [{"role": "system", "content": "You are a supportive assistant."}]
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"user message {i} " + "word " * 40})
+        messages.append({"role": "assistant", "content": f"reply {i} " + "word " * 40})
+    messages.append({"role": "user", "content": "What should I do next?"})
+    return messages
+
+
+def test_short_threads_are_sent_unchanged():
+    context = ConversationContext(lambda summary, messages: "summary", max_tokens=10000)
+    messages = _thread(2)
+    assert context.fit(messages) == messages
+
+
+def test_newest_message_is_kept_when_keep_turns_is_zero():
+    folded = []
+
+    def summarize(summary, messages):
+        folded.extend(messages)
+        return "summary"
+
+    context = ConversationContext(summarize, max_tokens=300, keep_turns=0, summary_tokens=50)
+    messages = _thread(6)
+    fitted = context.fit(messages)
+
+    assert fitted[-1] == messages[-1]
+    assert messages[-1] not in folded
+    assert fitted[1]["content"] == "Summary of the earlier conversation: summary"
@@ -0,0 +1,14 @@
+import json
+
+from database.providers import SQLiteProvider
+
+
+def test_entry_rows_have_decoded_data(tmp_path):
+    provider = SQLiteProvider(db_path=str(tmp_path / "dwell.db"))
+    entry = provider.add_entry("I went for a walk.", "user-1", "2026-10-18")
+
+    rows = provider.get_entries("user-1")
+    assert dict(rows[0])["data"] == {}
+    assert json.loads(json.dumps(rows[0]))["data"] == {}
+    assert dict(provider.get_entries_without_activities("user-1")[0])["data"] == {}
+    assert provider.get_entry(entry["id"])["data"] == {}
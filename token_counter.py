@@ -0,0 +1,47 @@
+"""
+Local token counting for prompts in Dwell
+Uses tiktoken (see requirements.txt); without it, or when its encoding files
+cannot be loaded (e.g. offline), counts are a characters-per-token estimate
+"""
+
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Rough average for English text with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    """tiktoken encoding for ``model``, or None if it is not available."""
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # The encoding is downloaded on first use; remember the failure
+        print(f"tiktoken encoding unavailable for {model}, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4") -> int:
+    """Number of tokens ``text`` takes for ``model`` (estimated without tiktoken)."""
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+
+def count_message_tokens(messages, model: str = "gpt-4") -> int:
+    """Tokens a list of chat messages takes, including per-message overhead."""
+    # ~4 tokens of role/separator overhead per message, 3 to prime the reply
+    return sum(count_tokens(m.get("content") or "", model) + 4 for m in messages) + 3
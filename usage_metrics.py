@@ -0,0 +1,93 @@
+"""
+Token usage and latency metrics for model calls in Dwell
+Aggregated per call site and per user for the lifetime of the process
+"""
+
+import contextvars
+import copy
+import threading
+from typing import Dict, Optional
+
+# User the current model calls are made for; copied into worker threads
+current_user_id = contextvars.ContextVar("current_user_id", default=None)
+
+ANONYMOUS_USER = "anonymous"
+
+METRIC_FIELDS = (
+    "calls",
+    "errors",
+    "cache_hits",
+    "prompt_tokens",
+    "completion_tokens",
+    "estimated_prompt_tokens",
+    "latency_seconds",
+)
+
+
+def set_current_user(user_id: Optional[str]):
+    """Attribute model calls made from this context to ``user_id``."""
+    current_user_id.set(user_id)
+
+
+class UsageMetrics:
+    """Thread-safe counters of model calls, tokens and latency.
+
+    ``prompt_tokens``/``completion_tokens`` come from the response ``usage``
+    when the API reports it and from the local tokenizer otherwise (e.g.
+    streamed completions); ``estimated_prompt_tokens`` is always the local
+    pre-flight count, so the two can be compared.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_call_site = {}
+        self._by_user = {}
+
+    @staticmethod
+    def _add(totals: Dict[str, Dict], key: str, values: Dict[str, float]):
+        bucket = totals.setdefault(key, dict.fromkeys(METRIC_FIELDS, 0))
+        for field, value in values.items():
+            bucket[field] += value
+
+    def record(
+        self,
+        call_site: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        estimated_prompt_tokens: int = 0,
+        latency_seconds: float = 0.0,
+        error: bool = False,
+        cache_hit: bool = False,
+        user_id: Optional[str] = None,
+    ):
+        """Add one model call (or extraction cache hit) to the totals."""
+        values = {
+            "calls": 0 if cache_hit else 1,
+            "errors": int(error),
+            "cache_hits": int(cache_hit),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "estimated_prompt_tokens": estimated_prompt_tokens,
+            "latency_seconds": latency_seconds,
+        }
+        user_id = user_id or current_user_id.get() or ANONYMOUS_USER
+        with self._lock:
+            self._add(self._by_call_site, call_site, values)
+            self._add(self._by_user, str(user_id), values)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Copy of the totals: overall, per call site and per user."""
+        with self._lock:
+            by_call_site = copy.deepcopy(self._by_call_site)
+            by_user = copy.deepcopy(self._by_user)
+        total = dict.fromkeys(METRIC_FIELDS, 0)
+        for bucket in by_call_site.values():
+            for field, value in bucket.items():
+                total[field] += value
+        return {"total": total, "by_call_site": by_call_site, "by_user": by_user}
+
+    def reset(self):
+        """Zero every counter."""
+        with self._lock:
+            self._by_call_site = {}
+            self._by_user = {}
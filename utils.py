@@ -1,37 +1,46 @@
 import os
 from data_model import ActivityEmotions, ValuesComparisons
-from database import DatabaseManager
+from database import DatabaseManager, register_entry_listener
 import json
 from auth import AuthManager
 from ai_service import ai_service
+from usage_metrics import set_current_user
+from job_queue import JobQueue
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Send one combined extraction per entry instead of one per page
+COMBINED_EXTRACTION = os.getenv("COMBINED_EXTRACTION", "true").lower() not in (
+    "0",
+    "false",
+    "no",
+)
+
+# Analyze new and edited entries on background workers instead of on button click
+BACKGROUND_ANALYSIS = os.getenv("BACKGROUND_ANALYSIS", "true").lower() not in (
+    "0",
+    "false",
+    "no",
+)
+
 # Initialize managers
 auth_manager = AuthManager()
 db_manager = DatabaseManager()
 
 
 def retry_on_error(x):
-    def decorator(func):
-        def wrapper(*args, **kwargs):
-            for i in range(1, x + 1):
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    print(f"Attempt {i} of {x} failed: {e}")
-                    if i == x:
-                        raise  # Re-raise the exception on the final attempt
-            # This line is no longer needed as the exception will be re-raised
-
-        return wrapper
-
-    return decorator
+    """Retry with exponential backoff; kept for older call sites."""
+    return ai_service.retry_on_error(x)
 
 
 def is_user_valid(st):
-    return auth_manager.is_user_valid(st)
+    user_valid, user_email = auth_manager.is_user_valid(st)
+    if user_valid:
+        # Attribute model usage in this script run to the logged-in user
+        session_data = st.session_state.get("session_data") or {}
+        set_current_user((session_data.get("user") or {}).get("id"))
+    return user_valid, user_email
 
 
 def is_user_subscriber(st, user_email):
@@ -101,29 +110,161 @@ def date_from_timestamp(iso_date_string):
     return str(date_object)
 
 
+def _render_message_stream(st, deltas):
+    """Render streamed deltas into a single placeholder and return the full text."""
+    placeholder = st.empty()
+    message = ""
+    for delta in deltas:
+        message += delta
+        placeholder.markdown(message + "▌")
+    placeholder.markdown(message)
+    return message
+
+
 def add_chat_message(st, user_id, thread_id, role, message, history):
-    print(f"{role}: {message}")
-    if role == "user":
-        with st.chat_message("user"):
-            st.markdown(message)
-    else:
-        with st.chat_message("assistant"):
+    """Render a chat message and persist it.
+
+    ``message`` may be a string or an iterator of deltas (e.g. from
+    ai_service.chat_thread_stream); streamed messages are rendered as they
+    arrive and only the assembled text is stored, once.
+    """
+    with st.chat_message("user" if role == "user" else "assistant"):
+        if isinstance(message, str):
             st.markdown(message)
+        else:
+            message = _render_message_stream(st, message)
+    print(f"{role}: {message}")
     history.append({"role": role, "content": message})
     db_manager.add_chat_message_DB(user_id, thread_id, role, message)
+    return message
 
 
-@ai_service.retry_on_error(3)  # Retry up to 3 times
-def get_activities_emotions(content, type="journal entry"):
+def get_user_bio():
     # Get user profile from auth manager
     if hasattr(auth_manager.provider, "get_user_bio"):
-        user_bio = auth_manager.provider.get_user_bio()
-    else:
-        user_bio = "I am a user interested in personal development."
+        return auth_manager.provider.get_user_bio()
+    return "I am a user interested in personal development."
+
 
-    return ai_service.extract_activities_emotions(content, user_bio, type)
+@ai_service.retry_on_error(3)  # Retry up to 3 times
+def get_activities_emotions(content, type="journal entry"):
+    return ai_service.extract_activities_emotions(content, get_user_bio(), type)
 
 
 @ai_service.retry_on_error(3)  # Retry up to 3 times
 def get_value_comparisons(content, type="journal entry"):
     return ai_service.extract_value_comparisons(content, type)
+
+
+@ai_service.retry_on_error(3)  # Retry up to 3 times
+def get_entry_analysis(content, type="journal entry"):
+    return ai_service.extract_entry_analysis(content, get_user_bio(), type)
+
+
+def _extract_entry(entry, need_activities, need_values):
+    content = entry["what_happened"]
+    if COMBINED_EXTRACTION and need_activities and need_values:
+        analysis = get_entry_analysis(content)
+        return analysis.act_emotions, analysis.values
+    act_emotions = get_activities_emotions(content) if need_activities else []
+    value_comps = get_value_comparisons(content) if need_values else []
+    return act_emotions, value_comps
+
+
+def analyze_entries(entries, max_concurrency=None):
+    """Extract and store activities and value comparisons for journal entries.
+
+    Each entry only gets the extractions it is still missing; when both are
+    missing a single combined model call fills both tables. Entries are
+    processed concurrently. Results are only stored if the entry still has
+    the analyzed content and nothing else stored the same analysis while the
+    model was running. Returns the entries whose analysis failed.
+    """
+    if not entries:
+        return []
+
+    user_id = entries[0]["user_id"]
+    entries_without_activities = {
+        entry["id"] for entry in db_manager.get_entries_without_activities(user_id)
+    }
+    entries_without_values = {
+        entry["id"]
+        for entry in db_manager.get_entries_without_value_comparisons(user_id)
+    }
+    # Entries that were analyzed in the meantime (e.g. by a background job) are skipped
+    entries = [
+        entry
+        for entry in entries
+        if entry["id"] in entries_without_activities
+        or entry["id"] in entries_without_values
+    ]
+    if not entries:
+        return []
+    value_ids = db_manager.get_value_ids_by_name()
+
+    results = ai_service.map_concurrently(
+        lambda entry: _extract_entry(
+            entry,
+            entry["id"] in entries_without_activities,
+            entry["id"] in entries_without_values,
+        ),
+        entries,
+        max_concurrency,
+    )
+
+    failed_entries = []
+    for entry, result in zip(entries, results):
+        if isinstance(result, Exception):
+            print(f"Analysis failed for entry {entry['id']}: {result}")
+            failed_entries.append(entry)
+            continue
+        act_emotions, value_comps = result
+        with db_manager.transaction(immediate=True):
+            current = db_manager.get_entry(entry["id"])
+            if current is None or current.get("content_hash") != entry.get("content_hash"):
+                print(f"Entry {entry['id']} was edited or deleted during analysis; discarding results")
+                continue
+            if act_emotions and not current["has_activities"]:
+                db_manager.add_activities_bulk(act_emotions, entry["id"], entry["user_id"])
+            if value_comps and not current["has_value_comparisons"]:
+                db_manager.add_value_comparison_instances_bulk(
+                    [
+                        (
+                            value_comp,
+                            value_ids[value_comp.superior.name.value],
+                            value_ids[value_comp.inferior.name.value],
+                        )
+                        for value_comp in value_comps
+                    ],
+                    entry,
+                )
+    return failed_entries
+
+
+def _analyze_entry_job(job):
+    """Job handler: analyze one entry, raising if it failed so the job is retried."""
+    entry = db_manager.get_entry(job["entry_id"])
+    if entry is None:
+        return  # deleted since it was queued
+    if job.get("content_hash") and entry.get("content_hash") != job["content_hash"]:
+        return  # edited since; the edit queued its own job
+    set_current_user(job["user_id"])
+    if analyze_entries([entry], max_concurrency=1):
+        raise RuntimeError(f"Analysis failed for entry {job['entry_id']}")
+
+
+def get_pending_analysis(user_id):
+    """Ids (as strings) of the user's entries waiting for background analysis."""
+    if not BACKGROUND_ANALYSIS:
+        return set()
+    return analysis_jobs.pending_entry_ids(user_id)
+
+
+if BACKGROUND_ANALYSIS:
+    analysis_jobs = JobQueue(_analyze_entry_job)
+    register_entry_listener(
+        lambda entry: analysis_jobs.enqueue(
+            entry["user_id"], entry["id"], entry.get("content_hash")
+        )
+    )
+    analysis_jobs.start()
@@ -1,44 +1,191 @@
-from collections import defaultdict
+from collections import defaultdict, deque
+
+
+class ValueGraph:
+    """Agreed `superior > inferior` comparisons kept as an incrementally built graph.
+
+    Conflicts are found with Tarjan's strongly connected components and the
+    topological order of the condensation in O(V + E). The transitive
+    reduction reuses that order with reachability bitsets, O(V * E / wordsize),
+    which is negligible for the 36 Rokeach values.
+    """
+
+    def __init__(self, pairs=()):
+        # dicts double as insertion-ordered sets so results are deterministic
+        self.graph = defaultdict(dict)
+        self.nodes = {}
+        self.comparisons = defaultdict(list)
+        self.comparison_ids = set()
+        self._analysis = None
+        for superior, inferior, reason, date in pairs:
+            self.add_comparison(superior, inferior, reason, date)
+
+    def add_comparison(
+        self, superior, inferior, reason=None, date=None, comparison_id=None
+    ):
+        """Add one agreed comparison; already added ``comparison_id``s are ignored."""
+        if comparison_id is not None:
+            if comparison_id in self.comparison_ids:
+                return
+            self.comparison_ids.add(comparison_id)
+        self.nodes.setdefault(superior, None)
+        self.nodes.setdefault(inferior, None)
+        self.graph[superior][inferior] = None
+        self.comparisons[superior, inferior].append((reason, date))
+        self._analysis = None
+
+    def _strongly_connected_components(self):
+        """Iterative Tarjan; components come out in reverse topological order."""
+        index = {}
+        lowlink = {}
+        on_stack = set()
+        stack = []
+        components = []
+        counter = 0
+
+        for root in self.nodes:
+            if root in index:
+                continue
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(self.graph.get(root, ())))]
+            while work:
+                node, successors = work[-1]
+                advanced = False
+                for successor in successors:
+                    if successor not in index:
+                        index[successor] = lowlink[successor] = counter
+                        counter += 1
+                        stack.append(successor)
+                        on_stack.add(successor)
+                        work.append((successor, iter(self.graph.get(successor, ()))))
+                        advanced = True
+                        break
+                    if successor in on_stack:
+                        lowlink[node] = min(lowlink[node], index[successor])
+                if advanced:
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+        return components
+
+    def _analyze(self):
+        if self._analysis is not None:
+            return self._analysis
+
+        components = list(reversed(self._strongly_connected_components()))
+        component_of = {
+            node: position
+            for position, component in enumerate(components)
+            for node in component
+        }
+
+        # Condensation edges, then reduce them from the sinks up
+        condensed = defaultdict(set)
+        for superior, inferiors in self.graph.items():
+            for inferior in inferiors:
+                if component_of[superior] != component_of[inferior]:
+                    condensed[component_of[superior]].add(component_of[inferior])
+
+        reach = [0] * len(components)
+        kept = set()
+        for position in reversed(range(len(components))):
+            reachable = 0
+            for successor in sorted(condensed[position]):
+                if reachable >> successor & 1:
+                    continue
+                kept.add((position, successor))
+                reachable |= (1 << successor) | reach[successor]
+            reach[position] = reachable
+
+        self._analysis = (components, component_of, kept)
+        return self._analysis
+
+    def topological_order(self):
+        """Values from most to least important; values in a conflict are grouped."""
+        components, _, _ = self._analyze()
+        return [node for component in components for node in component]
+
+    def _cycle_through(self, start, members):
+        parents = {start: None}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            for successor in self.graph.get(node, ()):
+                if successor not in members:
+                    continue
+                if successor == start:
+                    path = [node]
+                    while parents[path[-1]] is not None:
+                        path.append(parents[path[-1]])
+                    return list(reversed(path)) + [start]
+                if successor not in parents:
+                    parents[successor] = node
+                    queue.append(successor)
+        return None
+
+    def conflicts(self):
+        """One cycle (first node repeated at the end) per conflicting group of values."""
+        components, _, _ = self._analyze()
+        cycles = []
+        for component in components:
+            if len(component) == 1 and component[0] not in self.graph.get(component[0], ()):
+                continue
+            members = set(component)
+            start = next(node for node in self.nodes if node in members)
+            cycles.append(self._cycle_through(start, members))
+        return cycles
+
+    def transitive_reduction(self):
+        """Edges left after dropping those implied by longer chains.
+
+        Edges inside a conflict are kept so the cycle stays visible; between
+        two groups only the first edge (in comparison order) is kept.
+        """
+        _, component_of, kept = self._analyze()
+        edges = []
+        drawn = set()
+        for superior, inferiors in self.graph.items():
+            for inferior in inferiors:
+                pair = (component_of[superior], component_of[inferior])
+                if pair[0] == pair[1]:
+                    edges.append((superior, inferior))
+                elif pair in kept and pair not in drawn:
+                    drawn.add(pair)
+                    edges.append((superior, inferior))
+        return edges
+
 
 class ValueExaminor:
-    comparisons = defaultdict(list)
+    def __init__(self):
+        self.comparisons = defaultdict(list)
 
     def _build_graph(self, pairs):
-        graph = {}
-        for greater, lesser, reason, date in pairs:
-            if greater not in graph:
-                graph[greater] = []
-            graph[greater].append(lesser)
-            self.comparisons[greater, lesser].append((reason, date))
+        graph = ValueGraph(pairs)
+        self.comparisons = graph.comparisons
         return graph
 
-    def _find_all_paths(self, graph, start, path=[], conflict_callback=None):
-        path = path + [start]
-        if start not in graph:
-            return [path]
-        paths = []
-        for node in graph[start]:
-            if node in path:  # Detect cycle (conflict)
-                print(f"Conflict detected: {' > '.join(path + [node])}")
-                if conflict_callback:
-                  conflict_callback(path + [node], self.comparisons)
-                continue
-            newpaths = self._find_all_paths(graph, node, path, conflict_callback)
-            for newpath in newpaths:
-                paths.append(newpath)
-        return paths
-
     def derive_orders(self, pairs, conflict_callback=None):
         graph = self._build_graph(pairs)
-        all_paths = []
-        for node in graph:
-            all_paths.extend(self._find_all_paths(graph, node, conflict_callback=conflict_callback))
-        return all_paths
-    
+        for cycle in graph.conflicts():
+            print(f"Conflict detected: {' > '.join(cycle)}")
+            if conflict_callback:
+                conflict_callback(cycle, self.comparisons)
+        return [list(edge) for edge in graph.transitive_reduction()]
+
     def has_conflict(self, pairs):
-        graph = self._build_graph(pairs)
-        for node in graph:
-            paths = self._find_all_paths(graph, node)
-            if len(paths) > 1:
-                return True
-        return False
\ No newline at end of file
+        return len(self._build_graph(pairs).conflicts()) > 0
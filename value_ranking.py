@@ -0,0 +1,203 @@
+"""
+Ranking of a user's human values in Dwell
+Fits Bradley-Terry strengths for the Rokeach values from confirmed comparisons
+"""
+
+import math
+import os
+import time
+from collections import Counter
+from datetime import date, datetime
+from typing import Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from token_counter import count_tokens
+from values import ValueName
+
+VALUE_NAMES = [value.value for value in ValueName]
+
+
+def normalize_value_name(name: str) -> str:
+    """Map a display name ("A SENSE OF ACCOMPLISHMENT") to its ValueName value."""
+    return "_".join(name.strip().split(" ")).upper()
+
+
+def _timestamp(when: Any) -> float:
+    """Seconds since the epoch for a date, datetime, number or ISO string."""
+    if when is None:
+        return time.time()
+    if isinstance(when, (int, float)):
+        return float(when)
+    if isinstance(when, datetime):
+        return when.timestamp()
+    if isinstance(when, date):
+        return datetime(when.year, when.month, when.day).timestamp()
+    try:
+        return datetime.fromisoformat(str(when)).timestamp()
+    except ValueError:
+        return time.time()
+
+
+class ValueRanker:
+    """Bradley-Terry strengths for the 36 values, fitted with Hunter's MM updates.
+
+    Comparisons live in a 36x36 weighted win matrix, so adding one is O(1) and a
+    fit costs O(36^2) per iteration no matter how many comparisons there are.
+    Each comparison is weighted by exp((t - newest) / tau), i.e. it halves in
+    influence every ``half_life_days`` before the newest comparison. Every value
+    also plays ``prior_strength`` virtual games (half won) against a strength-1
+    opponent, which keeps values without data at 1 and the fit well defined.
+    """
+
+    def __init__(
+        self,
+        half_life_days: float = None,
+        prior_strength: float = None,
+        max_iterations: int = 100,
+        tolerance: float = 1e-6,
+    ):
+        half_life_days = half_life_days or float(
+            os.getenv("VALUE_RANKING_HALF_LIFE_DAYS", "180")
+        )
+        self.tau = half_life_days * 86400 / math.log(2)
+        self.prior_strength = (
+            prior_strength
+            if prior_strength is not None
+            else float(os.getenv("VALUE_RANKING_PRIOR_STRENGTH", "1"))
+        )
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+
+        self.index = {name: i for i, name in enumerate(VALUE_NAMES)}
+        self.wins = np.zeros((len(VALUE_NAMES), len(VALUE_NAMES)))
+        self.strengths = np.ones(len(VALUE_NAMES))
+        self.comparison_ids = set()
+        self._anchor = None
+        self._newest = None
+        self._fitted = True
+
+    @classmethod
+    def from_comparisons(
+        cls, comparisons: Iterable[Tuple[str, str, Any]], **kwargs
+    ) -> "ValueRanker":
+        """Build a ranker from (superior, inferior, date) tuples."""
+        ranker = cls(**kwargs)
+        for superior, inferior, when in comparisons:
+            ranker.add_comparison(superior, inferior, when)
+        return ranker
+
+    def add_comparison(
+        self, superior: str, inferior: str, when: Any = None, comparison_id=None
+    ) -> bool:
+        """Record that ``superior`` was preferred over ``inferior`` at ``when``.
+
+        Returns False for unknown values, self-comparisons and already added
+        ``comparison_id``s.
+        """
+        i = self.index.get(normalize_value_name(superior))
+        j = self.index.get(normalize_value_name(inferior))
+        if i is None or j is None or i == j:
+            return False
+        if comparison_id is not None:
+            if comparison_id in self.comparison_ids:
+                return False
+            self.comparison_ids.add(comparison_id)
+
+        t = _timestamp(when)
+        if self._anchor is None:
+            self._anchor = t
+        elif t - self._anchor > 100 * self.tau:
+            # Keep stored weights within float range by moving the anchor forward
+            self.wins *= math.exp((self._anchor - t) / self.tau)
+            self._anchor = t
+        self._newest = t if self._newest is None else max(self._newest, t)
+
+        self.wins[i, j] += math.exp((t - self._anchor) / self.tau)
+        self._fitted = False
+        return True
+
+    def fit(self) -> np.ndarray:
+        """Fit strengths, warm-starting from the previous fit."""
+        if self._fitted:
+            return self.strengths
+        if self._newest is None:
+            self.strengths = np.ones(len(VALUE_NAMES))
+            self._fitted = True
+            return self.strengths
+
+        # Rescale so the newest comparison has weight 1
+        wins = self.wins * math.exp((self._anchor - self._newest) / self.tau)
+        games = wins + wins.T
+        won = wins.sum(axis=1) + self.prior_strength / 2
+        strengths = self.strengths.copy()
+        for _ in range(self.max_iterations):
+            pair_sums = strengths[:, None] + strengths[None, :]
+            denominator = (games / pair_sums).sum(axis=1) + self.prior_strength / (
+                strengths + 1
+            )
+            updated = won / denominator
+            converged = np.max(np.abs(updated - strengths) / strengths) < self.tolerance
+            strengths = updated
+            if converged:
+                break
+
+        self.strengths = strengths
+        self._fitted = True
+        return self.strengths
+
+    def top_k(self, k: Optional[int] = 5) -> List[Tuple[str, float]]:
+        """The ``k`` strongest compared values as (name, strength), strongest first."""
+        strengths = self.fit()
+        compared = np.flatnonzero((self.wins + self.wins.T).sum(axis=1) > 0)
+        order = compared[np.argsort(-strengths[compared], kind="stable")]
+        if k is not None:
+            order = order[:k]
+        return [(VALUE_NAMES[i], float(strengths[i])) for i in order]
+
+
+def summarize_values(
+    comparisons: Iterable[Tuple[str, str, Any]],
+    token_budget: int = None,
+    model: str = "gpt-4",
+) -> str:
+    """Compact, token-budgeted summary of (superior, inferior, date) comparisons.
+
+    Duplicate pairs are collapsed with a count. The summary starts with the
+    values in ranked order, followed by the most frequent pairs. Items are
+    added only while the text stays within ``token_budget`` tokens (env
+    VALUE_SUMMARY_TOKEN_BUDGET, default 200).
+    """
+    token_budget = token_budget or int(os.getenv("VALUE_SUMMARY_TOKEN_BUDGET", "200"))
+    ranker = ValueRanker()
+    counts = Counter()
+    for superior, inferior, when in comparisons:
+        if ranker.add_comparison(superior, inferior, when):
+            counts[normalize_value_name(superior), normalize_value_name(inferior)] += 1
+    if not counts:
+        return ""
+
+    ranking = [name for name, _ in ranker.top_k(None)]
+    position = {name: i for i, name in enumerate(ranking)}
+    pairs = sorted(
+        counts.items(),
+        key=lambda item: (-item[1], position[item[0][0]], position[item[0][1]]),
+    )
+
+    summary = "Values from most to least important: "
+    separator = ""
+    for name in ranking:
+        candidate = summary + separator + name
+        if count_tokens(candidate + ".", model) > token_budget:
+            break
+        summary, separator = candidate, " > "
+    summary += "."
+
+    separator = " Most frequent preferences: "
+    for (superior, inferior), count in pairs:
+        pair = f"{superior} > {inferior}" + (f" ({count}x)" if count > 1 else "")
+        candidate = summary + separator + pair
+        if count_tokens(candidate, model) > token_budget:
+            break
+        summary, separator = candidate, "; "
+    return summary